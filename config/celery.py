@@ -1,8 +1,29 @@
 import os
 from celery import Celery
+from kombu import Queue
+
+from config.settings import REMINDER_SHARDS
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+
+def reminder_queue(shard: int) -> str:
+    """Очередь шарда напоминаний."""
+    return f"reminders.{shard}"
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Пачки напоминаний попадают в очередь шарда, выбранного диспетчером, остальные задачи - в общую очередь."""
+    if name == "habits_tracker.tasks.send_reminders":
+        return {"queue": reminder_queue(kwargs.get("shard") or 0)}
+    return {"queue": app.conf.task_default_queue}
+
+
+app.conf.task_queues = [Queue(app.conf.task_default_queue)] + [
+    Queue(reminder_queue(shard)) for shard in range(REMINDER_SHARDS)
+]
+app.conf.task_routes = (route_task,)
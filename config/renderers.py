@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+# Как и JSONRenderer, экранируем разделители строк, недопустимые в строках JavaScript.
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же выводом: компактный JSON в UTF-8, время в ISO 8601 с Z для UTC.
+
+    Типы, которые orjson не сериализует сам (Decimal, timedelta, ленивые строки), преобразуются
+    кодировщиком DRF. Ответы с отступами (параметр indent) и работа без установленного orjson
+    обслуживаются стандартным JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        for separator, escaped in LINE_SEPARATORS:
+            content = content.replace(separator, escaped)
+        return content
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson, для тел не в UTF-8 и без orjson используется стандартный JSONParser."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -15,6 +15,7 @@ import sys
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -157,6 +158,14 @@ if CACHE_ENABLED:
         }
     }
 
+PUBLIC_FEED_CACHE_TIMEOUT = 5 * 60
+
+# Размер пачки строк курсора базы данных при выгрузке привычек (/habits/export/).
+HABIT_EXPORT_CHUNK_SIZE = 2000
+
+# Число строк, сохраняемых одной транзакцией при импорте привычек (import_habits, /habits/import/).
+HABIT_IMPORT_CHUNK_SIZE = 1000
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -165,6 +174,15 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "config.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -189,8 +207,43 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-due-reminders": {
+        "task": "habits_tracker.tasks.dispatch_due_reminders",
+        "schedule": crontab(),
+    },
+}
+if os.getenv("BEAT_CLEANUP_ENABLED") == "True":
+    CELERY_BEAT_SCHEDULE["cleanup-beat-schedules"] = {
+        "task": "habits_tracker.tasks.cleanup_beat_schedules",
+        "schedule": crontab(minute=0, hour=3),
+    }
+BEAT_CLEANUP_CHUNK_SIZE = 500
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+
+REMINDER_DELIVERY_CONCURRENCY = int(os.getenv("REMINDER_DELIVERY_CONCURRENCY", 16))
+REMINDER_DELIVERY_TIMEOUT = 10
+REMINDER_CHAT_INTERVAL = 1.0
+REMINDER_BATCH_SIZE = 500
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", 4))
+REMINDER_SPREAD_ENABLED = os.getenv("REMINDER_SPREAD_ENABLED") == "True"
+REMINDER_SPREAD_WINDOW = 60
+REMINDER_SPREAD_RATE = 25
+REMINDER_SPREAD_BURST = 50
+
+REMINDER_SENDER = os.getenv("REMINDER_SENDER", "celery")
+REMINDER_QUEUE_URL = os.getenv("REMINDER_QUEUE_URL", CELERY_BROKER_URL)
+REMINDER_ASYNC_CONCURRENCY = int(os.getenv("REMINDER_ASYNC_CONCURRENCY", 1000))
+REMINDER_ASYNC_MAX_PENDING = 5000
+REMINDER_ASYNC_MAX_RETRIES = 3
+REMINDER_ASYNC_BACKOFF = 1.0
+REMINDER_ASYNC_SHUTDOWN_TIMEOUT = 30
+
+REMINDER_LOG_FLUSH_SIZE = 500
+REMINDER_LOG_FLUSH_INTERVAL = 5
+REMINDER_SCHEDULE_CACHE_SIZE = 1024
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Habits API",
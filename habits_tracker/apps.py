@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HabitsTrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'habits_tracker'
+
+    def ready(self):
+        import habits_tracker.signals  # noqa: F401
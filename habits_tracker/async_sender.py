@@ -0,0 +1,210 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from redis import asyncio as aioredis
+
+from config.settings import (REMINDER_ASYNC_BACKOFF, REMINDER_ASYNC_CONCURRENCY, REMINDER_ASYNC_MAX_PENDING,
+                             REMINDER_ASYNC_MAX_RETRIES, REMINDER_ASYNC_SHUTDOWN_TIMEOUT, REMINDER_BATCH_SIZE,
+                             REMINDER_DELIVERY_TIMEOUT, REMINDER_QUEUE_URL, TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN)
+from habits_tracker import delivery_log
+from habits_tracker.delivery import FAILED, SENT, THROTTLED, ChatRateLimiter, DeliveryResult, Reminder
+from habits_tracker.reminder_queue import FETCH_DUE_SCRIPT, QUEUE_KEY, encode
+
+
+class AsyncTelegramClient:
+    """Асинхронный клиент Telegram Bot API. Используется как асинхронный контекстный менеджер."""
+
+    def __init__(self, token: str = TELEGRAM_BOT_TOKEN, base_url: str = TELEGRAM_API_URL,
+                 connections: int = REMINDER_ASYNC_CONCURRENCY, timeout: float = REMINDER_DELIVERY_TIMEOUT):
+        self.url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self.connections = connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *args):
+        await self.session.close()
+
+    async def send(self, reminder: Reminder) -> DeliveryResult:
+        """Отправляет одно напоминание и возвращает результат."""
+        result = DeliveryResult(habit_pk=reminder.habit_pk, chat_id=reminder.chat_id, status=FAILED)
+        started = time.monotonic()
+        payload = {"chat_id": reminder.chat_id, "text": reminder.text}
+        try:
+            async with self.session.post(self.url, json=payload) as response:
+                result.status_code = response.status
+                if response.ok:
+                    result.status = SENT
+                else:
+                    try:
+                        body = await response.json(content_type=None)
+                    except ValueError:
+                        body = {}
+                    result.error = body.get("description") or response.reason
+                    if response.status == 429:
+                        result.status = THROTTLED
+                        result.retry_after = body.get("parameters", {}).get("retry_after")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            result.error = str(exc) or type(exc).__name__
+        result.latency = time.monotonic() - started
+        return result
+
+
+class AsyncDeliveryEngine:
+    """Отправка напоминаний в одном цикле событий: тысячи одновременных запросов на одном ядре.
+
+    Число запросов в полете ограничено concurrency. После ответа 429 попытка повторяется через retry_after,
+    после ошибок сети и 5xx - с экспоненциально растущей паузой, не более max_retries раз.
+    """
+
+    def __init__(self, client: AsyncTelegramClient, concurrency: int = REMINDER_ASYNC_CONCURRENCY,
+                 rate_limiter: ChatRateLimiter | None = None, max_retries: int = REMINDER_ASYNC_MAX_RETRIES,
+                 backoff: float = REMINDER_ASYNC_BACKOFF):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limiter = rate_limiter or ChatRateLimiter()
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def _retry_delay(self, result: DeliveryResult, attempt: int) -> float | None:
+        """Пауза перед повтором или None, если ошибка не исправится повтором (например, 400 или 403)."""
+        if result.status == THROTTLED and result.retry_after is not None:
+            return result.retry_after
+        if result.status == THROTTLED or result.status_code is None or result.status_code >= 500:
+            return self.backoff * 2 ** attempt
+        return None
+
+    async def _send(self, reminder: Reminder) -> DeliveryResult:
+        for attempt in range(self.max_retries + 1):
+            delay = self.rate_limiter.reserve(reminder.chat_id)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self.semaphore:
+                result = await self.client.send(reminder)
+            pause = None if result.status == SENT else self._retry_delay(result, attempt)
+            if pause is None or attempt == self.max_retries:
+                return result
+            await asyncio.sleep(pause)
+
+    async def _send_chat(self, reminders: list[Reminder], on_result=None) -> list[DeliveryResult]:
+        """Последовательно отправляет напоминания одного чата, сохраняя их порядок."""
+        results = []
+        for reminder in reminders:
+            results.append(await self._send(reminder))
+            if on_result:
+                on_result(reminder, results[-1])
+        return results
+
+    async def deliver(self, reminders: list[Reminder], on_result=None) -> list[DeliveryResult]:
+        """Отправляет пачку напоминаний и возвращает результат по каждому сообщению.
+
+        on_result(напоминание, результат) вызывается сразу после завершения отправки каждого напоминания.
+        """
+        by_chat = defaultdict(list)
+        for reminder in reminders:
+            by_chat[reminder.chat_id].append(reminder)
+        chunks = await asyncio.gather(*(self._send_chat(chat, on_result) for chat in by_chat.values()))
+        return [result for chunk in chunks for result in chunk]
+
+
+@dataclass
+class Batch:
+    """Пачка напоминаний в работе: результаты завершенных отправок по id напоминания."""
+    reminders: list[Reminder]
+    results: dict = field(default_factory=dict)
+    recorded: bool = False
+
+    def unfinished(self) -> list[Reminder]:
+        return [reminder for reminder in self.reminders if id(reminder) not in self.results]
+
+
+class AsyncReminderConsumer:
+    """Забирает наступившие напоминания из очереди Redis и отправляет их до сигнала остановки.
+
+    Новые пачки не забираются, пока в работе больше max_pending напоминаний. При остановке текущие
+    пачки дорабатывают не дольше shutdown_timeout, неотправленные напоминания возвращаются в очередь.
+    """
+
+    def __init__(self, engine: AsyncDeliveryEngine, redis=None, batch_size: int = REMINDER_BATCH_SIZE,
+                 max_pending: int = REMINDER_ASYNC_MAX_PENDING, poll_interval: float = 0.5,
+                 shutdown_timeout: float = REMINDER_ASYNC_SHUTDOWN_TIMEOUT):
+        self.engine = engine
+        self.redis = redis or aioredis.Redis.from_url(REMINDER_QUEUE_URL)
+        self.fetch_due = self.redis.register_script(FETCH_DUE_SCRIPT)
+        self.batch_size = batch_size
+        self.max_batches = max(1, max_pending // batch_size)
+        self.poll_interval = poll_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.stopping = asyncio.Event()
+        self.batches = {}
+        self.stats = defaultdict(int)
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self.stopping.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def fetch(self) -> list[Reminder]:
+        """Забирает до batch_size напоминаний, время отправки которых наступило, одним скриптом Redis."""
+        members = await self.fetch_due(keys=[QUEUE_KEY], args=[time.time(), self.batch_size])
+        return [Reminder(**json.loads(member)) for member in members]
+
+    async def requeue(self, reminders: list[Reminder]) -> None:
+        await self.redis.zadd(QUEUE_KEY, {encode(reminder.as_dict()): time.time() for reminder in reminders})
+        self.stats["requeued"] += len(reminders)
+
+    async def record(self, batch: Batch) -> None:
+        """Записывает в журнал известные результаты пачки, не более одного раза."""
+        if batch.results and not batch.recorded:
+            batch.recorded = True
+            await sync_to_async(delivery_log.record)(list(batch.results.values()))
+
+    async def process(self, batch: Batch) -> None:
+        def finished(reminder, result):
+            batch.results[id(reminder)] = result
+            self.stats[result.status] += 1
+
+        await self.engine.deliver(batch.reminders, on_result=finished)
+        await self.record(batch)
+
+    async def run(self) -> dict:
+        while not self.stopping.is_set():
+            if len(self.batches) >= self.max_batches:
+                await asyncio.wait(self.batches, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            reminders = await self.fetch()
+            if not reminders:
+                await self._idle()
+                continue
+            batch = Batch(reminders)
+            task = asyncio.create_task(self.process(batch))
+            self.batches[task] = batch
+            task.add_done_callback(self.batches.pop)
+
+        if self.batches:
+            done, pending = await asyncio.wait(self.batches, timeout=self.shutdown_timeout)
+            # Уже отправленные напоминания прерванных пачек записываются в журнал, в очередь возвращаются
+            # только неотправленные, иначе пользователь получит их повторно.
+            interrupted = [self.batches[task] for task in pending]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for batch in interrupted:
+                await self.record(batch)
+            unfinished = [reminder for batch in interrupted for reminder in batch.unfinished()]
+            if unfinished:
+                await self.requeue(unfinished)
+        return dict(self.stats)
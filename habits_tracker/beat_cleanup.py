@@ -0,0 +1,59 @@
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+from django_celery_beat.models import CrontabSchedule, PeriodicTask, PeriodicTasks
+
+from config.settings import BEAT_CLEANUP_CHUNK_SIZE
+
+LEGACY_REMINDER_TASK = "habits_tracker.tasks.send_message"
+
+
+def orphaned_tasks():
+    """Периодические задачи отдельных привычек: напоминания рассылает диспетчер, эти задачи больше не нужны."""
+    return PeriodicTask.objects.filter(task=LEGACY_REMINDER_TASK)
+
+
+def orphaned_schedules():
+    """Расписания crontab, на которые не ссылается ни одна задача, кроме устаревших задач привычек."""
+    used = PeriodicTask.objects.filter(crontab=OuterRef("pk")).exclude(task=LEGACY_REMINDER_TASK)
+    return CrontabSchedule.objects.filter(~Exists(used))
+
+
+def _delete_in_chunks(queryset, chunk_size: int) -> int:
+    """Удаляет строки пачками по первичному ключу, не загружая объекты.
+
+    Сигналы django_celery_beat на удаление обновляют отметку изменения расписания для каждой строки,
+    поэтому строки удаляются явным DELETE без сигналов и каскада Django, а отметка обновляется один раз
+    после очистки. Каскад не нужен: задачи удаляются раньше расписаний, на которые они ссылаются.
+    """
+    meta, connection = queryset.model._meta, connections[queryset.db]
+    table, column = connection.ops.quote_name(meta.db_table), connection.ops.quote_name(meta.pk.column)
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(pks))})", pks)
+            deleted += cursor.rowcount
+
+
+def sweep(chunk_size: int = BEAT_CLEANUP_CHUNK_SIZE, dry_run: bool = False) -> dict:
+    """Удаляет устаревшие задачи привычек и неиспользуемые расписания и возвращает отчет.
+
+    Отчет содержит число найденных строк и число задач, которые beat загружает после очистки.
+    """
+    tasks, schedules = orphaned_tasks(), orphaned_schedules()
+    report = {
+        "tasks": tasks.count(),
+        "enabled_tasks": tasks.filter(enabled=True).count(),
+        "schedules": schedules.count(),
+    }
+    if not dry_run and (report["tasks"] or report["schedules"]):
+        _delete_in_chunks(tasks, chunk_size)
+        _delete_in_chunks(schedules, chunk_size)
+        PeriodicTasks.update_changed()
+
+    report["remaining_tasks"] = PeriodicTask.objects.count()
+    report["remaining_enabled_tasks"] = PeriodicTask.objects.filter(enabled=True).count()
+    report["remaining_schedules"] = CrontabSchedule.objects.count()
+    return report
@@ -0,0 +1,53 @@
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from habits_tracker.models import Habit
+
+
+def _list_state(request) -> dict:
+    """Число привычек пользователя и время последнего изменения - один запрос по индексу (user, updated_at)."""
+    if not hasattr(request, "_habit_list_state"):
+        request._habit_list_state = Habit.objects.filter(user=request.user).aggregate(
+            count=Count("id"), updated_at=Max("updated_at")
+        )
+    return request._habit_list_state
+
+
+def list_count(request) -> int:
+    return _list_state(request)["count"]
+
+
+def list_etag(request, *args, **kwargs) -> str:
+    """ETag списка привычек: меняется при создании, изменении и удалении привычек пользователя.
+
+    В ключ входят параметры запроса, поэтому у каждой страницы свой ETag.
+    """
+    state = _list_state(request)
+    key = f"{request.user.pk}:{state['count']}:{state['updated_at']}:{request.get_full_path()}"
+    return md5(key.encode()).hexdigest()
+
+
+def _detail_state(request, pk) -> tuple | None:
+    """Время изменения привычки, если она принадлежит пользователю, иначе None (проверит сам запрос)."""
+    if not hasattr(request, "_habit_detail_state"):
+        row = Habit.objects.filter(pk=pk).values_list("user_id", "updated_at").first()
+        request._habit_detail_state = row if row and row[0] == request.user.pk else None
+    return request._habit_detail_state
+
+
+def detail_etag(request, pk, *args, **kwargs) -> str | None:
+    state = _detail_state(request, pk)
+    return md5(f"{pk}:{state[1]}".encode()).hexdigest() if state else None
+
+
+def detail_last_modified(request, pk, *args, **kwargs):
+    state = _detail_state(request, pk)
+    return state[1] if state else None
+
+
+# Last-Modified для списка не отдается: удаление привычки не меняет время последнего изменения.
+conditional_list = method_decorator(condition(etag_func=list_etag))
+conditional_detail = method_decorator(condition(etag_func=detail_etag, last_modified_func=detail_last_modified))
@@ -0,0 +1,123 @@
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from config.settings import CELERY_TIMEZONE, REMINDER_SCHEDULE_CACHE_SIZE
+
+WEEKDAY_NUMBERS = {
+    "Воскресенье": 0,
+    "Понедельник": 1,
+    "Вторник": 2,
+    "Среда": 3,
+    "Четверг": 4,
+    "Пятница": 5,
+    "Суббота": 6,
+}
+
+# Сколько дней вперед искать ближайшее срабатывание: покрывает любую комбинацию дня месяца и месяца.
+SEARCH_DAYS = 366 * 4
+
+
+def parse_field(value: str, low: int, high: int, names: dict | None = None) -> frozenset[int]:
+    """Разбор одного поля crontab в множество подходящих значений."""
+    values = set()
+    for part in value.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(bound) for bound in part.split("-"))
+        else:
+            start = names[part] if names and part in names else int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or step < 1:
+            raise ValueError(f"Некорректное значение поля crontab: {value}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Расписание в формате crontab: минута, час, день месяца, месяц, день недели."""
+
+    def __init__(self, crontab: str):
+        minute, hour, day_of_month, month_of_year, day_of_week = crontab.split()
+        self.minutes = tuple(sorted(parse_field(minute, 0, 59)))
+        self.hours = tuple(sorted(parse_field(hour, 0, 23)))
+        self.days_of_month = parse_field(day_of_month, 1, 31)
+        self.months = parse_field(month_of_year, 1, 12)
+        self.days_of_week = frozenset(day % 7 for day in parse_field(day_of_week, 0, 7, WEEKDAY_NUMBERS))
+        self.any_day_of_month = day_of_month == "*"
+        self.any_day_of_week = day_of_week == "*"
+
+    def day_matches(self, day) -> bool:
+        """Проверяет, может ли расписание сработать в указанный день."""
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days_of_month
+        in_week = (day.weekday() + 1) % 7 in self.days_of_week
+        if self.any_day_of_month or self.any_day_of_week:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after: datetime, tz: ZoneInfo | None = None) -> datetime | None:
+        """Ближайшее время срабатывания строго после указанного момента."""
+        tz = tz or ZoneInfo(CELERY_TIMEZONE)
+        start = after.astimezone(tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(SEARCH_DAYS):
+            if self.day_matches(day):
+                for hour in self.hours:
+                    if day == start.date() and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if day == start.date() and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime.combine(day, time(hour, minute), tzinfo=tz)
+            day += timedelta(days=1)
+        return None
+
+
+def normalize(crontab: str) -> str:
+    return " ".join(crontab.split())
+
+
+@lru_cache(maxsize=REMINDER_SCHEDULE_CACHE_SIZE)
+def _interned_schedule(crontab: str) -> CronSchedule | None:
+    try:
+        return CronSchedule(crontab)
+    except (KeyError, ValueError):
+        return None
+
+
+def get_schedule(crontab: str | None) -> CronSchedule | None:
+    """Разобранное расписание из ограниченного LRU-кеша процесса или None для некорректной строки.
+
+    Различных строк crontab у всех пользователей немного, поэтому каждая разбирается один раз.
+    Расписания неизменяемы, так что один объект безопасно используется из разных потоков.
+    """
+    if not crontab:
+        return None
+    return _interned_schedule(normalize(crontab))
+
+
+def warm_up(crontabs) -> dict:
+    """Заполняет кеш расписаний и возвращает отчет о прогреве."""
+    crontabs = {normalize(crontab) for crontab in crontabs if crontab}
+    invalid = sorted(crontab for crontab in crontabs if _interned_schedule(crontab) is None)
+    info = _interned_schedule.cache_info()
+    return {
+        "distinct": len(crontabs),
+        "valid": len(crontabs) - len(invalid),
+        "invalid": invalid,
+        "cached": info.currsize,
+        "capacity": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+    }
+
+
+def next_run_at(crontab: str | None, after: datetime) -> datetime | None:
+    """Время следующего напоминания для crontab или None, если строка не является расписанием."""
+    schedule = get_schedule(crontab)
+    return schedule.next_after(after) if schedule else None
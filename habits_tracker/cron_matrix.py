@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config.settings import CELERY_TIMEZONE
+from habits_tracker.cron import get_schedule
+
+MINUTES_PER_DAY = 24 * 60
+
+# 1 января 1970 года - четверг, в нумерации crontab это 4.
+EPOCH_WEEKDAY = 4
+
+
+def _to_day(value: date) -> np.datetime64:
+    return np.datetime64(value.isoformat(), "D")
+
+
+class CronMatrix:
+    """Расписания множества привычек в виде битовых масок по минутам суток и дням.
+
+    Строки crontab разбираются один раз для каждого уникального значения, все дальнейшие вычисления
+    выполняются операциями NumPy над масками. Время считается в часовом поясе CELERY_TIMEZONE,
+    результаты возвращаются как datetime64[m] без часового пояса.
+    """
+
+    def __init__(self, crontabs):
+        values = np.asarray([crontab or "" for crontab in crontabs], dtype=str)
+        self.unique, self.inverse = np.unique(values, return_inverse=True)
+        size = len(self.unique)
+
+        self.valid = np.zeros(size, dtype=bool)
+        minutes = np.zeros((size, 60), dtype=bool)
+        hours = np.zeros((size, 24), dtype=bool)
+        self.days_of_month = np.zeros((size, 31), dtype=bool)
+        self.months = np.zeros((size, 12), dtype=bool)
+        self.days_of_week = np.zeros((size, 7), dtype=bool)
+        self.any_day = np.zeros(size, dtype=bool)
+
+        for index, crontab in enumerate(self.unique):
+            schedule = get_schedule(crontab)
+            if schedule is None:
+                continue
+            self.valid[index] = True
+            minutes[index, list(schedule.minutes)] = True
+            hours[index, list(schedule.hours)] = True
+            self.days_of_month[index, [day - 1 for day in schedule.days_of_month]] = True
+            self.months[index, [month - 1 for month in schedule.months]] = True
+            self.days_of_week[index, list(schedule.days_of_week)] = True
+            self.any_day[index] = schedule.any_day_of_month or schedule.any_day_of_week
+
+        self.minute_of_day = (hours[:, :, None] & minutes[:, None, :]).reshape(size, MINUTES_PER_DAY)
+
+    def __len__(self) -> int:
+        return len(self.inverse)
+
+    def day_mask(self, start: date, days: int) -> np.ndarray:
+        """Маска (уникальные расписания x дни): срабатывает ли расписание в каждый из дней."""
+        dates = _to_day(start) + np.arange(days)
+        month_start = dates.astype("datetime64[M]")
+        day_of_month = (dates - month_start.astype("datetime64[D]")).astype(int)
+        month = month_start.astype(int) % 12
+        day_of_week = (dates.astype(int) + EPOCH_WEEKDAY) % 7
+
+        in_month = self.days_of_month[:, day_of_month]
+        in_week = self.days_of_week[:, day_of_week]
+        matches = np.where(self.any_day[:, None], in_month & in_week, in_month | in_week)
+        return matches & self.months[:, month] & self.valid[:, None]
+
+    def fire_mask(self, start: date, days: int = 1) -> np.ndarray:
+        """Маска (уникальные расписания x минуты периода) срабатываний начиная с полуночи start."""
+        mask = self.day_mask(start, days)[:, :, None] & self.minute_of_day[:, None, :]
+        return mask.reshape(len(self.unique), days * MINUTES_PER_DAY)
+
+    def load_profile(self, start: date, days: int = 1) -> np.ndarray:
+        """Количество напоминаний в каждую минуту периода по всем привычкам."""
+        weights = np.bincount(self.inverse, minlength=len(self.unique))
+        return weights @ self.fire_mask(start, days)
+
+    def fire_times(self, start: date, days: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Все срабатывания за период: индексы привычек и соответствующее время."""
+        mask = self.fire_mask(start, days)
+        order = np.argsort(self.inverse, kind="stable")
+        counts = np.bincount(self.inverse, minlength=len(self.unique))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        origin = _to_day(start).astype("datetime64[m]")
+
+        habit_chunks, time_chunks = [], []
+        for index in np.flatnonzero(mask.any(axis=1)):
+            habits = order[starts[index]:ends[index]]
+            offsets = np.flatnonzero(mask[index])
+            habit_chunks.append(np.repeat(habits, len(offsets)))
+            time_chunks.append(np.tile(origin + offsets, len(habits)))
+        if not habit_chunks:
+            return np.empty(0, dtype=int), np.empty(0, dtype="datetime64[m]")
+        return np.concatenate(habit_chunks), np.concatenate(time_chunks)
+
+    def next_fire(self, after: datetime, horizon: int = 8) -> np.ndarray:
+        """Ближайшее срабатывание каждой привычки строго после after или NaT, если его нет в горизонте дней."""
+        local = after.astimezone(ZoneInfo(CELERY_TIMEZONE)).replace(tzinfo=None)
+        offset = local.hour * 60 + local.minute + 1
+        mask = self.fire_mask(local.date(), horizon)[:, offset:]
+        found = mask.any(axis=1)
+        first = np.argmax(mask, axis=1) + offset
+
+        origin = _to_day(local.date()).astype("datetime64[m]")
+        result = np.where(found, origin + first, np.datetime64("NaT", "m"))
+        return result[self.inverse]
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import (REMINDER_CHAT_INTERVAL, REMINDER_DELIVERY_CONCURRENCY, REMINDER_DELIVERY_TIMEOUT,
+                             TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN)
+from habits_tracker.models import Habit
+
+SENT = "sent"
+FAILED = "failed"
+THROTTLED = "throttled"
+
+
+@dataclass
+class Reminder:
+    """Напоминание, готовое к отправке."""
+    habit_pk: int
+    chat_id: str
+    text: str
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class DeliveryResult:
+    """Результат отправки одного напоминания."""
+    habit_pk: int
+    chat_id: str
+    status: str
+    status_code: int | None = None
+    error: str | None = None
+    retry_after: int | None = None
+    latency: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ChatRateLimiter:
+    """Ограничение частоты отправки сообщений в один чат.
+
+    Слоты чатов, которые уже наступили, не отличаются от отсутствующих и удаляются не чаще раза
+    в prune_interval секунд, чтобы словарь слотов не рос с каждым новым чатом воркера.
+    """
+    prune_interval = 60.0
+
+    def __init__(self, interval: float = REMINDER_CHAT_INTERVAL):
+        self.interval = interval
+        self._next_slot = {}
+        self._prune_at = time.monotonic() + self.prune_interval
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        self._next_slot = {chat_id: slot for chat_id, slot in self._next_slot.items() if slot > now}
+        self._prune_at = now + self.prune_interval
+
+    def reserve(self, chat_id: str) -> float:
+        """Резервирует ближайший свободный слот чата и возвращает задержку до него в секундах."""
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._prune_at:
+                self._prune(now)
+            slot = max(now, self._next_slot.get(chat_id, now))
+            self._next_slot[chat_id] = slot + self.interval
+            return slot - now
+
+
+class TelegramClient:
+    """Клиент Telegram Bot API с пулом keep-alive соединений."""
+
+    def __init__(self, token: str = TELEGRAM_BOT_TOKEN, base_url: str = TELEGRAM_API_URL,
+                 pool_size: int = REMINDER_DELIVERY_CONCURRENCY, timeout: float = REMINDER_DELIVERY_TIMEOUT):
+        self.url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def send(self, reminder: Reminder) -> DeliveryResult:
+        """Отправляет одно напоминание и возвращает результат."""
+        result = DeliveryResult(habit_pk=reminder.habit_pk, chat_id=reminder.chat_id, status=FAILED)
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                self.url,
+                json={"chat_id": reminder.chat_id, "text": reminder.text},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as exc:
+            result.error = str(exc)
+            result.latency = time.monotonic() - started
+            return result
+
+        result.latency = time.monotonic() - started
+        result.status_code = response.status_code
+        if response.ok:
+            result.status = SENT
+            return result
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        result.error = payload.get("description") or response.reason
+        if response.status_code == 429:
+            result.status = THROTTLED
+            result.retry_after = payload.get("parameters", {}).get("retry_after")
+        return result
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class DeliveryEngine:
+    """Пакетная отправка напоминаний с ограничением параллелизма и частоты сообщений в чат."""
+
+    def __init__(self, client: TelegramClient | None = None, concurrency: int = REMINDER_DELIVERY_CONCURRENCY,
+                 rate_limiter: ChatRateLimiter | None = None):
+        self.client = client or TelegramClient(pool_size=concurrency)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter or ChatRateLimiter()
+
+    def _send_chat(self, reminders: list[Reminder]) -> list[DeliveryResult]:
+        """Последовательно отправляет напоминания одного чата, выдерживая интервал между ними."""
+        results = []
+        for reminder in reminders:
+            delay = self.rate_limiter.reserve(reminder.chat_id)
+            if delay > 0:
+                time.sleep(delay)
+            results.append(self.client.send(reminder))
+        return results
+
+    def deliver(self, reminders: list[Reminder]) -> list[DeliveryResult]:
+        """Отправляет пачку напоминаний и возвращает результат по каждому сообщению."""
+        by_chat = defaultdict(list)
+        for reminder in reminders:
+            by_chat[reminder.chat_id].append(reminder)
+        if not by_chat:
+            return []
+
+        workers = min(self.concurrency, len(by_chat))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(self._send_chat, by_chat.values())
+            return [result for chunk in chunks for result in chunk]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> DeliveryEngine:
+    """Возвращает общий для процесса движок, чтобы соединения переиспользовались между задачами."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeliveryEngine()
+        return _engine
+
+
+def collect_reminders(pks: list[int]) -> list[Reminder]:
+    """Собирает напоминания привычек из сохраненных снимков одним запросом."""
+    rows = Habit.objects.filter(pk__in=pks, reminder_payload__isnull=False).values_list("pk", "reminder_payload")
+    return [Reminder(habit_pk=pk, **payload) for pk, payload in rows]
@@ -0,0 +1,155 @@
+import atexit
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from config.settings import REMINDER_LOG_FLUSH_INTERVAL, REMINDER_LOG_FLUSH_SIZE
+from habits_tracker.delivery import DeliveryResult
+from habits_tracker.models import ReminderDelivery, ReminderDeliveryHour
+
+# Верхние границы корзин гистограммы времени ответа в миллисекундах, последняя корзина - все остальное.
+LATENCY_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def latency_bucket(latency: float) -> int:
+    return bisect_left(LATENCY_BUCKETS, latency * 1000)
+
+
+def percentile(histogram: list[int], q: float) -> float | None:
+    """Оценка перцентиля времени ответа (мс) по гистограмме с линейной интерполяцией внутри корзины."""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = total * q / 100
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            low = LATENCY_BUCKETS[index - 1] if index else 0
+            if index == len(LATENCY_BUCKETS):
+                return float(low)
+            return round(low + (LATENCY_BUCKETS[index] - low) * (rank - seen) / count, 1)
+        seen += count
+    return float(LATENCY_BUCKETS[-1])
+
+
+def write(rows: list[tuple[DeliveryResult, datetime]]) -> None:
+    """Сохраняет результаты отправки одним bulk_create и добавляет их в почасовые сводки."""
+    hours = defaultdict(lambda: {"sent": 0, "failed": 0, "throttled": 0, "histogram": [0] * (len(LATENCY_BUCKETS) + 1)})
+    deliveries = []
+    for result, created_at in rows:
+        deliveries.append(ReminderDelivery(
+            habit_id=result.habit_pk,
+            chat_id=result.chat_id,
+            status=result.status,
+            status_code=result.status_code,
+            error=result.error[:255] if result.error else None,
+            retry_after=result.retry_after,
+            latency=result.latency,
+            created_at=created_at,
+        ))
+        summary = hours[created_at.replace(minute=0, second=0, microsecond=0)]
+        summary[result.status] += 1
+        summary["histogram"][latency_bucket(result.latency)] += 1
+
+    with transaction.atomic():
+        ReminderDelivery.objects.bulk_create(deliveries, batch_size=REMINDER_LOG_FLUSH_SIZE)
+        for hour, summary in sorted(hours.items()):
+            stats, created = ReminderDeliveryHour.objects.select_for_update().get_or_create(hour=hour)
+            stats.sent += summary["sent"]
+            stats.failed += summary["failed"]
+            stats.throttled += summary["throttled"]
+            stats.latency_histogram = [
+                old + new for old, new in zip(stats.latency_histogram or [0] * len(summary["histogram"]),
+                                              summary["histogram"])
+            ]
+            stats.save()
+
+
+class DeliveryLogBuffer:
+    """Буфер результатов отправки в памяти процесса.
+
+    Результаты записываются пачкой, когда их накопилось flush_size или через flush_interval секунд
+    после первого результата в буфере, а также при завершении процесса.
+    """
+
+    def __init__(self, flush_size: int = REMINDER_LOG_FLUSH_SIZE, flush_interval: float = REMINDER_LOG_FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, results: list[DeliveryResult]) -> None:
+        now = timezone.now()
+        with self._lock:
+            self._rows.extend((result, now) for result in results)
+            if len(self._rows) < self.flush_size:
+                if self._rows and self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def _take(self) -> list:
+        with self._lock:
+            rows, self._rows = self._rows, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            return rows
+
+    def flush(self) -> None:
+        rows = self._take()
+        if rows:
+            write(rows)
+
+    def _flush_on_timer(self) -> None:
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> DeliveryLogBuffer:
+    """Возвращает общий для процесса буфер журнала отправок."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = DeliveryLogBuffer()
+            atexit.register(_buffer.flush)
+        return _buffer
+
+
+def record(results: list[DeliveryResult]) -> None:
+    """Добавляет результаты отправки в журнал."""
+    if results:
+        get_buffer().add(results)
+
+
+def hourly_stats(hours: int) -> list[dict]:
+    """Почасовая сводка отправок за последние hours часов: доля успешных отправок и перцентили времени ответа."""
+    since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    stats = []
+    for summary in ReminderDeliveryHour.objects.filter(hour__gte=since).order_by("hour"):
+        total = summary.sent + summary.failed + summary.throttled
+        stats.append({
+            "hour": summary.hour,
+            "total": total,
+            "sent": summary.sent,
+            "failed": summary.failed,
+            "throttled": summary.throttled,
+            "success_rate": round(summary.sent / total, 4) if total else None,
+            "latency_p50_ms": percentile(summary.latency_histogram, 50),
+            "latency_p95_ms": percentile(summary.latency_histogram, 95),
+            "latency_p99_ms": percentile(summary.latency_histogram, 99),
+        })
+    return stats
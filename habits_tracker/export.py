@@ -0,0 +1,55 @@
+import csv
+from itertools import islice
+
+from django.conf import settings
+
+from config.renderers import ORJSONRenderer
+from habits_tracker.serializers import HabitSerializer, RowSerializer
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "habits.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "habits.csv"),
+}
+
+rows = RowSerializer(HabitSerializer)
+
+
+class _Echo:
+    """Буфер csv.writer, возвращающий записанную строку вместо ее хранения."""
+
+    def write(self, value):
+        return value
+
+
+def iter_habits(queryset, chunk_size: int | None = None):
+    """Привычки в представлении HabitSerializer пачками по chunk_size строк курсора базы данных.
+
+    В памяти одновременно находится только одна пачка, дни недели пачки загружаются одним запросом.
+    """
+    chunk_size = chunk_size or settings.HABIT_EXPORT_CHUNK_SIZE
+    iterator = rows.project(queryset.order_by("id")).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield from rows.to_representation(chunk)
+
+
+def as_ndjson(habits):
+    renderer = ORJSONRenderer()
+    for habit in habits:
+        yield renderer.render(habit) + b"\n"
+
+
+def as_csv(habits):
+    writer = csv.writer(_Echo())
+    columns = [name for name, key, convert in rows.columns]
+    yield writer.writerow(columns)
+    for habit in habits:
+        yield writer.writerow(
+            ",".join(map(str, value)) if isinstance(value, list) else value
+            for value in (habit[name] for name in columns)
+        )
+
+
+def stream(queryset, export_format: str):
+    """Строки файла выгрузки привычек в формате export_format (ndjson или csv)."""
+    habits = iter_habits(queryset)
+    return as_ndjson(habits) if export_format == "ndjson" else as_csv(habits)
@@ -0,0 +1,61 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "public-habits:version"
+HITS_KEY = "public-habits:hits"
+MISSES_KEY = "public-habits:misses"
+
+
+def is_enabled() -> bool:
+    """Кеш ленты включается вместе с общим кешем проекта (CACHE_ENABLED)."""
+    return settings.CACHE_ENABLED
+
+
+def _increment(key: str, initial: int = 0) -> int:
+    """Атомарно увеличивает счетчик в кеше, создавая его при необходимости."""
+    cache.add(key, initial, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, initial + 1, timeout=None)
+        return initial + 1
+
+
+def get_version() -> int:
+    return cache.get_or_set(VERSION_KEY, 1, timeout=None)
+
+
+def page_key(request) -> str:
+    """Ключ страницы ленты: версия ленты, хост и параметры запроса (курсор, размер страницы)."""
+    path = md5(f"{request.get_host()}{request.get_full_path()}".encode()).hexdigest()
+    return f"public-habits:{get_version()}:{path}"
+
+
+def get_page(key: str):
+    """Возвращает сохраненную страницу ленты или None и учитывает попадание или промах."""
+    data = cache.get(key)
+    _increment(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def set_page(key: str, data) -> None:
+    """Сохраняет страницу под ключом, полученным до ее построения, чтобы не пережить инвалидацию."""
+    cache.set(key, data, timeout=settings.PUBLIC_FEED_CACHE_TIMEOUT)
+
+
+def invalidate() -> None:
+    """Сбрасывает все страницы ленты сменой версии: старые ключи просто истекут."""
+    _increment(VERSION_KEY, initial=1)
+
+
+def get_stats() -> dict:
+    hits, misses = cache.get(HITS_KEY, 0), cache.get(MISSES_KEY, 0)
+    return {
+        "enabled": is_enabled(),
+        "version": get_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
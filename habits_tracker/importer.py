@@ -0,0 +1,184 @@
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from rest_framework.serializers import ValidationError
+
+from habits_tracker import user_stats
+from habits_tracker.models import Day, Habit
+from habits_tracker.services import HABIT_FIELDS, as_datetime, bulk_save_habits
+from habits_tracker.validators import HabitValidator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = ("ndjson", "csv")
+
+# Колонки выгрузки (/habits/export/), которые переносятся при импорте; id, user и служебные поля игнорируются.
+TEXT_FIELDS = ("place", "action", "reward", "frequency")
+BOOLEAN_FIELDS = ("pleasent", "publicity")
+INTEGER_FIELDS = ("execution_time", "max_lateness", "related_habits")
+TIME_FIELDS = ("time", "end_time")
+TRUE_VALUES = ("true", "1", "yes")
+
+# Сколько ошибок строк сохраняется в отчете, остальные только передаются в on_error.
+MAX_REPORTED_ERRORS = 100
+
+loads = orjson.loads if orjson else json.loads
+
+
+class RowError(Exception):
+    pass
+
+
+def read_ndjson(stream):
+    """Строки файла NDJSON в виде пар (номер строки, объект или RowError)."""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = loads(line)
+        except ValueError as exc:
+            yield line_number, RowError(f"Некорректный JSON: {exc}")
+            continue
+        yield line_number, row if isinstance(row, dict) else RowError("Ожидается объект привычки.")
+
+
+def read_csv(stream):
+    """Строки файла CSV с заголовком в виде пар (номер строки, словарь)."""
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _value(name, value):
+    """Значение колонки из CSV (строки) или NDJSON (типы JSON) в виде данных запроса привычки."""
+    if value in ("", None):
+        return None
+    if name in BOOLEAN_FIELDS:
+        return value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+    if name in INTEGER_FIELDS:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise RowError(f"{name}: ожидается целое число.")
+    if name in TIME_FIELDS:
+        try:
+            value = as_datetime(value)
+        except (TypeError, ValueError):
+            raise RowError(f"{name}: ожидается время в формате ISO 8601.")
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+    value = str(value)
+    if len(value) > HABIT_FIELDS[name].max_length:
+        raise RowError(f"{name}: не более {HABIT_FIELDS[name].max_length} символов.")
+    return value
+
+
+def _days(value, days: dict[int, Day], day_ids: dict[str, int]) -> list[int]:
+    """Дни недели по id или названию, из списка JSON или строки через запятую."""
+    if value in ("", None):
+        return []
+    tokens = value.split(",") if isinstance(value, str) else value
+    result = []
+    for token in tokens:
+        token = str(token).strip()
+        pk = int(token) if token.isdigit() else day_ids.get(token)
+        if pk not in days:
+            raise RowError(f"Неизвестный день недели: {token}.")
+        result.append(pk)
+    return result
+
+
+def to_attrs(row: dict, days: dict[int, Day], day_ids: dict[str, int]) -> dict:
+    """Данные запроса привычки из строки файла.
+
+    Частота по умолчанию у приятной привычки отбрасывается: так такие привычки хранятся в базе
+    данных и попадают в выгрузку, а данные запроса приятной привычки частоты не содержат.
+    """
+    attrs = {}
+    for name in TEXT_FIELDS + BOOLEAN_FIELDS + INTEGER_FIELDS + TIME_FIELDS:
+        value = _value(name, row.get(name))
+        if value is not None:
+            attrs[name] = value
+    related = attrs.pop("related_habits", None)
+    if related is not None:
+        attrs["related_habit_id"] = attrs["related_habits_id"] = related
+    if attrs.get("pleasent") and attrs.get("frequency") == Habit._meta.get_field("frequency").default:
+        del attrs["frequency"]
+    attrs["days_of_week"] = _days(row.get("days_of_week"), days, day_ids)
+    return attrs
+
+
+def import_habits(user, stream, import_format: str, chunk_size: int | None = None, on_error=None) -> dict:
+    """Импортирует привычки пользователя из файла NDJSON или CSV в формате выгрузки /habits/export/.
+
+    Файл читается потоком, строки проверяются по правилам HabitValidator и сохраняются пачками по
+    chunk_size строк, каждая пачка - одной транзакцией bulk_save_habits. Ошибочные строки пропускаются
+    и передаются в on_error(номер строки, сообщение), ошибка базы данных пропускает только свою пачку.
+    Связанная привычка (related_habits) указывается id уже сохраненной приятной привычки пользователя.
+    """
+    chunk_size = chunk_size or settings.HABIT_IMPORT_CHUNK_SIZE
+    rows = read_ndjson(stream) if import_format == "ndjson" else read_csv(stream)
+    validator = HabitValidator()
+    days = Day.objects.in_bulk()
+    day_ids = {day.day: pk for pk, day in days.items()}
+    report = {"rows": 0, "imported": 0, "skipped": 0, "errors": []}
+    started = time.perf_counter()
+
+    def skip(line_number, message):
+        report["skipped"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "error": message})
+        if on_error:
+            on_error(line_number, message)
+
+    while chunk := list(islice(rows, chunk_size)):
+        report["rows"] += len(chunk)
+        parsed = []
+        for line_number, row in chunk:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                parsed.append((line_number, to_attrs(row, days, day_ids)))
+            except RowError as exc:
+                skip(line_number, str(exc))
+
+        related_ids = {attrs["related_habit_id"] for line_number, attrs in parsed if "related_habit_id" in attrs}
+        related = dict(
+            Habit.objects.filter(user=user, pk__in=related_ids).values_list("pk", "pleasent")
+        ) if related_ids else {}
+
+        valid = []
+        for line_number, attrs in parsed:
+            if "related_habit_id" in attrs and attrs["related_habit_id"] not in related:
+                skip(line_number, "Связанная привычка не найдена!")
+                continue
+            try:
+                validator.validate(attrs, related)
+            except ValidationError as exc:
+                skip(line_number, " ".join(str(message) for message in exc.detail))
+                continue
+            valid.append((line_number, attrs))
+
+        if not valid:
+            continue
+        try:
+            bulk_save_habits(user, [attrs for line_number, attrs in valid], [], days=days, rebuild_stats=False)
+        except DatabaseError as exc:
+            for line_number, attrs in valid:
+                skip(line_number, f"Ошибка базы данных: {exc}")
+        else:
+            report["imported"] += len(valid)
+
+    if report["imported"]:
+        user_stats.rebuild_users([user.pk])
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else None
+    return report
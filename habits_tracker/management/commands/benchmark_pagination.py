@@ -0,0 +1,58 @@
+import time
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from habits_tracker.models import Habit
+from habits_tracker.views import HabitListAPIView
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compares page fetch latency of offset and cursor pagination of the habit list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def measure(self, user, params, repeat) -> float:
+        """Медиана времени ответа списка привычек в миллисекундах."""
+        view = HabitListAPIView.as_view()
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+        timings = []
+        for _ in range(repeat):
+            request = factory.get("/habits/", params)
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2]
+
+    def handle(self, *args, **options):
+        pages, page_size, repeat = options["pages"], options["page_size"], options["repeat"]
+        with transaction.atomic():
+            user = User.objects.create(email="pagination-benchmark@habits.local")
+            total = max(pages) * page_size
+            Habit.objects.bulk_create(
+                (Habit(user=user, action=f"Action {number}", pleasent=True) for number in range(total)),
+                batch_size=5000,
+            )
+            ids = list(Habit.objects.filter(user=user).order_by("id").values_list("id", flat=True))
+
+            self.stdout.write(f"{'page':>8} {'offset, ms':>12} {'cursor, ms':>12}")
+            for page in pages:
+                offset = self.measure(user, {"page": page, "page_size": page_size}, repeat)
+                params = {"pagination": "cursor", "page_size": page_size}
+                if page > 1:
+                    position = urlencode({"p": ids[(page - 1) * page_size - 1]})
+                    params["cursor"] = b64encode(position.encode("ascii")).decode("ascii")
+                cursor = self.measure(user, params, repeat)
+                self.stdout.write(f"{page:>8} {offset:>12.2f} {cursor:>12.2f}")
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Pagination benchmark finished successfully."))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from config.renderers import ORJSONRenderer
+from habits_tracker.models import Habit
+from habits_tracker.paginators import HabitCursorPaginator, HabitPaginator
+from habits_tracker.views import HabitListAPIView, PublicHabitListAPIView
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compares render time of the stdlib and orjson JSON renderers on large habit list pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def fetch(self, view, path, user, page_size):
+        """Данные страницы списка: ограничение размера страницы пагинаторов снимается на время запроса."""
+        limits = {paginator: paginator.max_page_size for paginator in (HabitPaginator, HabitCursorPaginator)}
+        try:
+            for paginator in limits:
+                paginator.max_page_size = page_size
+            request = APIRequestFactory(SERVER_NAME="localhost").get(path, {"page_size": page_size})
+            force_authenticate(request, user=user)
+            return view.as_view()(request).data
+        finally:
+            for paginator, limit in limits.items():
+                paginator.max_page_size = limit
+
+    @staticmethod
+    def measure(renderer, data, repeat) -> tuple[float, bytes]:
+        """Медиана времени рендеринга в миллисекундах и полученный JSON."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = renderer.render(data, "application/json")
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2], content
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        with transaction.atomic():
+            user = User.objects.create(email="renderer-benchmark@habits.local")
+            Habit.objects.bulk_create(
+                (Habit(user=user, action=f"Action {number}", place="Дом", publicity=True,
+                       frequency="30 16 * * Понедельник,Вторник")
+                 for number in range(page_size)),
+                batch_size=5000,
+            )
+            for habit in Habit.objects.filter(user=user):
+                habit.refresh_next_run_at()
+
+            self.stdout.write(f"{'endpoint':>16} {'rows':>8} {'json, ms':>10} {'orjson, ms':>12} {'identical':>10}")
+            for view, path in ((HabitListAPIView, "/habits/"), (PublicHabitListAPIView, "/habits/public/")):
+                data = self.fetch(view, path, user, page_size)
+                stdlib, expected = self.measure(JSONRenderer(), data, options["repeat"])
+                fast, content = self.measure(ORJSONRenderer(), data, options["repeat"])
+                self.stdout.write(f"{path:>16} {len(data['results']):>8} {stdlib:>10.2f} {fast:>12.2f} "
+                                  f"{str(content == expected):>10}")
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Renderer benchmark finished successfully."))
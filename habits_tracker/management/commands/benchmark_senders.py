@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+from aiohttp import web
+from django.core.management import BaseCommand
+
+from habits_tracker.async_sender import AsyncDeliveryEngine, AsyncTelegramClient
+from habits_tracker.delivery import SENT, ChatRateLimiter, DeliveryEngine, Reminder, TelegramClient
+
+
+class MockTelegramAPI:
+    """Локальный сервер Telegram Bot API с заданной задержкой ответа в отдельном потоке."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.url = None
+
+    async def send_message(self, request):
+        await request.json()
+        await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": {}})
+
+    def serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/bot{token}/sendMessage", self.send_message)
+        self.runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0, backlog=4096)
+        self.loop.run_until_complete(site.start())
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self.ready.set()
+        self.loop.run_forever()
+
+    def __enter__(self):
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = "Compares the thread pool reminder sender with the asyncio sender against a local mock Telegram API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reminders", type=int, default=5000)
+        parser.add_argument("--latency", type=float, default=0.1, help="Mock API response time in seconds.")
+        parser.add_argument("--threads", type=int, default=16, help="Concurrency of the thread pool sender.")
+        parser.add_argument("--concurrency", type=int, default=1000, help="In-flight requests of the asyncio sender.")
+
+    def run_threads(self, url, reminders, concurrency):
+        client = TelegramClient(token="benchmark", base_url=url, pool_size=concurrency)
+        engine = DeliveryEngine(client=client, concurrency=concurrency, rate_limiter=ChatRateLimiter(interval=0))
+        try:
+            return engine.deliver(reminders)
+        finally:
+            client.close()
+
+    async def run_async(self, url, reminders, concurrency):
+        async with AsyncTelegramClient(token="benchmark", base_url=url, connections=concurrency) as client:
+            engine = AsyncDeliveryEngine(client, concurrency=concurrency, rate_limiter=ChatRateLimiter(interval=0))
+            return await engine.deliver(reminders)
+
+    def report(self, name, started, results):
+        elapsed = time.perf_counter() - started
+        sent = sum(result.status == SENT for result in results)
+        self.stdout.write(f"{name:>10} {sent:>8} {elapsed:>10.2f} {sent / elapsed:>12.1f}")
+
+    def handle(self, *args, **options):
+        reminders = [Reminder(habit_pk=pk, chat_id=str(pk), text=f"Habit {pk}") for pk in range(options["reminders"])]
+        with MockTelegramAPI(options["latency"]) as api:
+            self.stdout.write(f"{'sender':>10} {'sent':>8} {'time, s':>10} {'messages/s':>12}")
+            started = time.perf_counter()
+            self.report("threads", started, self.run_threads(api.url, reminders, options["threads"]))
+            started = time.perf_counter()
+            self.report("asyncio", started, asyncio.run(self.run_async(api.url, reminders, options["concurrency"])))
+        self.stdout.write(self.style.SUCCESS("Sender benchmark finished successfully."))
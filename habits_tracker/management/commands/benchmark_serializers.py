@@ -0,0 +1,65 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from habits_tracker.models import Day, Habit
+from habits_tracker.serializers import HabitSerializer, PublicHabitSerializer, RowSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compares rows per second of ModelSerializer and RowSerializer on habit list pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    @staticmethod
+    def measure(render, repeat) -> tuple[float, bytes]:
+        """Лучшая скорость сериализации в строках в секунду и полученный JSON."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows, content = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return rows / best, content
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        with transaction.atomic():
+            user = User.objects.create(email="serializer-benchmark@habits.local")
+            days = list(Day.objects.all()[:2])
+            habits = Habit.objects.bulk_create(
+                (Habit(user=user, action=f"Action {number}", place="Home", publicity=True, frequency="30 16 * * *")
+                 for number in range(options["habits"])),
+                batch_size=5000,
+            )
+            Habit.days_of_week.through.objects.bulk_create(
+                Habit.days_of_week.through(habit_id=habit.pk, day_id=day.pk) for habit in habits for day in days
+            )
+
+            self.stdout.write(f"{'serializer':>22} {'model, rows/s':>14} {'rows, rows/s':>14} {'identical':>10}")
+            for serializer_class in (HabitSerializer, PublicHabitSerializer):
+                row_serializer = RowSerializer(serializer_class)
+                queryset = Habit.objects.filter(user=user).prefetch_related(*row_serializer.many).order_by("id")
+
+                def model_render():
+                    data = serializer_class(queryset.all(), many=True).data
+                    return len(data), renderer.render(data)
+
+                def row_render():
+                    data = row_serializer.to_representation(row_serializer.project(queryset.all()))
+                    return len(data), renderer.render(data)
+
+                model_speed, model_content = self.measure(model_render, options["repeat"])
+                row_speed, row_content = self.measure(row_render, options["repeat"])
+                self.stdout.write(
+                    f"{serializer_class.__name__:>22} {model_speed:>14.0f} {row_speed:>14.0f} "
+                    f"{str(model_content == row_content):>10}"
+                )
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Serializer benchmark finished successfully."))
@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+from django.core.management import BaseCommand
+
+from config.settings import REMINDER_SPREAD_BURST, REMINDER_SPREAD_RATE, REMINDER_SPREAD_WINDOW
+from habits_tracker.spreading import spread
+
+
+class Command(BaseCommand):
+    help = "Simulates delivery of a minute-boundary reminder spike with and without spreading and reports lateness."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reminders", type=int, default=1500)
+        parser.add_argument("--capacity", type=float, default=30, help="Messages per second Telegram accepts.")
+        parser.add_argument("--max-lateness", type=int, nargs="+", default=[30, 60, 300],
+                            help="Per-habit lateness bounds in seconds, assigned at random.")
+        parser.add_argument("--window", type=float, default=REMINDER_SPREAD_WINDOW)
+        parser.add_argument("--rate", type=float, default=REMINDER_SPREAD_RATE)
+        parser.add_argument("--burst", type=int, default=REMINDER_SPREAD_BURST)
+        parser.add_argument("--seed", type=int, default=0)
+
+    @staticmethod
+    def deliver(send_at: np.ndarray, capacity: float) -> np.ndarray:
+        """Время доставки при очереди FIFO, обслуживающей capacity сообщений в секунду."""
+        delivered = np.empty_like(send_at)
+        free_at = 0.0
+        for index in np.argsort(send_at, kind="stable"):
+            free_at = max(free_at, send_at[index]) + 1 / capacity
+            delivered[index] = free_at
+        return delivered
+
+    def report(self, name: str, send_at: np.ndarray, bounds: np.ndarray, capacity: float) -> None:
+        lateness = self.deliver(send_at, capacity)
+        p50, p95, p99 = np.percentile(lateness, [50, 95, 99])
+        peak = np.bincount(send_at.astype(int)).max()
+        missed = int((lateness > bounds).sum())
+        self.stdout.write(
+            f"{name:>10} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {lateness.max():>8.1f} {peak:>10} {missed:>8}"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        bounds = np.array([rng.choice(options["max_lateness"]) for _ in range(options["reminders"])], dtype=float)
+        capacity = options["capacity"]
+
+        self.stdout.write(f"{'mode':>10} {'p50, s':>8} {'p95, s':>8} {'p99, s':>8} {'max, s':>8} {'peak/s':>10} "
+                          f"{'missed':>8}")
+        self.report("burst", np.zeros(len(bounds)), bounds, capacity)
+        offsets = spread(list(bounds), window=options["window"], rate=options["rate"], burst=options["burst"])
+        self.report("spread", np.array(offsets), bounds, capacity)
+        self.stdout.write(self.style.SUCCESS("Spreading benchmark finished successfully."))
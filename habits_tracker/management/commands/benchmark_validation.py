@@ -0,0 +1,57 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from habits_tracker.models import Habit
+from habits_tracker.serializers import HabitSerializer
+from habits_tracker.validators import HabitValidator
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Measures habit validation cost per habit with per-habit and batched related-habit lookups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=1000)
+        parser.add_argument("--related", type=int, default=50, help="Number of pleasant habits to link to.")
+
+    def measure(self, items, batched: bool) -> tuple[float, int]:
+        """Время проверки одной привычки в микросекундах и число запросов на всю пачку."""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            context = {"related_pleasant": HabitValidator.load_related(items)} if batched else {}
+            for item in items:
+                serializer = HabitSerializer(data=dict(item), context=context)
+                if not serializer.is_valid():
+                    raise ValueError(serializer.errors)
+            elapsed = time.perf_counter() - started
+        return elapsed / len(items) * 1_000_000, len(queries)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(email="validation-benchmark@habits.local")
+            related = Habit.objects.bulk_create(
+                Habit(user=user, action=f"Pleasant {number}", pleasent=True) for number in range(options["related"])
+            )
+            items = [
+                {
+                    "action": f"Action {number}",
+                    "place": "Home",
+                    "time": "2025-03-30T16:30:00+03:00",
+                    "frequency": "m h * * *",
+                    "execution_time": 60,
+                    "related_habit_id": related[number % len(related)].pk,
+                    "related_habits_id": related[number % len(related)].pk,
+                }
+                for number in range(options["habits"])
+            ]
+
+            self.stdout.write(f"{'mode':>10} {'us/habit':>10} {'queries':>10}")
+            for name, batched in (("single", False), ("batched", True)):
+                cost, queries = self.measure(items, batched)
+                self.stdout.write(f"{name:>10} {cost:>10.1f} {queries:>10}")
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Validation benchmark finished successfully."))
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from habits_tracker.cron import warm_up
+from habits_tracker.models import Habit
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports distinct habit schedules, invalid ones and whether the schedule cache of a worker process "
+        "can hold them all. Worker processes fill their own cache on start."
+    )
+
+    def handle(self, *args, **kwargs):
+        frequencies = Habit.objects.filter(pleasent=False).values_list("frequency", flat=True).distinct()
+        report = warm_up(frequencies.iterator())
+
+        self.stdout.write(f"Distinct schedules: {report['distinct']} (valid: {report['valid']})")
+        self.stdout.write(f"Cached: {report['cached']} of {report['capacity']}")
+        for crontab in report["invalid"]:
+            self.stdout.write(self.style.WARNING(f"Invalid schedule: {crontab}"))
+        if report["distinct"] > report["capacity"]:
+            warning = "REMINDER_SCHEDULE_CACHE_SIZE is smaller than the number of distinct schedules."
+            self.stdout.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS("Schedule check finished successfully."))
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from config.settings import BEAT_CLEANUP_CHUNK_SIZE
+from habits_tracker.beat_cleanup import sweep
+
+
+class Command(BaseCommand):
+    help = "Deletes legacy per-habit periodic tasks and crontab schedules no task uses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=BEAT_CLEANUP_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        report = sweep(chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+        action = "Would delete" if options["dry_run"] else "Deleted"
+
+        self.stdout.write(f"{action} periodic tasks: {report['tasks']} (enabled: {report['enabled_tasks']})")
+        self.stdout.write(f"{action} crontab schedules: {report['schedules']}")
+        self.stdout.write(
+            f"Beat now loads {report['remaining_enabled_tasks']} enabled of {report['remaining_tasks']} tasks "
+            f"and {report['remaining_schedules']} crontab schedules."
+        )
+        self.stdout.write(self.style.SUCCESS("Beat schedule cleanup finished successfully."))
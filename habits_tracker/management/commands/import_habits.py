@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+
+from config.settings import HABIT_IMPORT_CHUNK_SIZE
+from habits_tracker.importer import FORMATS, import_habits
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Imports habits of a user from an NDJSON or CSV file in the /habits/export/ format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Email or id of the user the habits are imported for.")
+        parser.add_argument("--format", choices=FORMATS, help="File format, detected by the extension by default.")
+        parser.add_argument("--chunk-size", type=int, default=HABIT_IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        lookup = {"pk": int(options["user"])} if options["user"].isdigit() else {"email": options["user"]}
+        user = User.objects.filter(**lookup).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} does not exist.")
+        import_format = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+
+        def on_error(line_number, message):
+            self.stderr.write(f"Line {line_number}: {message}")
+
+        with path.open("rb") as stream:
+            report = import_habits(user, stream, import_format, options["chunk_size"], on_error=on_error)
+
+        self.stdout.write(
+            f"Read {report['rows']} rows, imported {report['imported']}, skipped {report['skipped']} "
+            f"in {report['seconds']} s ({report['rows_per_second']} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS("Habits imported successfully."))
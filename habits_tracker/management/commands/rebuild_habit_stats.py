@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand
+
+from habits_tracker.user_stats import rebuild_users
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-user habit statistics table in chunks of users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_pk, rebuilt = 0, 0
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            rebuilt += rebuild_users(user_ids)
+            last_pk = user_ids[-1]
+            self.stdout.write(f"Rebuilt statistics of {rebuilt} users")
+        self.stdout.write(self.style.SUCCESS("Habit statistics rebuilt successfully."))
@@ -0,0 +1,34 @@
+import asyncio
+import signal
+
+from django.core.management import BaseCommand
+
+from config.settings import REMINDER_ASYNC_CONCURRENCY, REMINDER_ASYNC_MAX_PENDING, REMINDER_BATCH_SIZE
+from habits_tracker import delivery_log
+from habits_tracker.async_sender import AsyncDeliveryEngine, AsyncReminderConsumer, AsyncTelegramClient
+
+
+class Command(BaseCommand):
+    help = "Runs the asyncio reminder sender that drains due reminders from Redis (REMINDER_SENDER=async)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=REMINDER_ASYNC_CONCURRENCY)
+        parser.add_argument("--batch-size", type=int, default=REMINDER_BATCH_SIZE)
+        parser.add_argument("--max-pending", type=int, default=REMINDER_ASYNC_MAX_PENDING)
+
+    async def serve(self, options) -> dict:
+        async with AsyncTelegramClient(connections=options["concurrency"]) as client:
+            engine = AsyncDeliveryEngine(client, concurrency=options["concurrency"])
+            consumer = AsyncReminderConsumer(engine, batch_size=options["batch_size"],
+                                             max_pending=options["max_pending"])
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, consumer.stop)
+            return await consumer.run()
+
+    def handle(self, *args, **options):
+        self.stdout.write("Async reminder sender started.")
+        stats = asyncio.run(self.serve(options))
+        delivery_log.get_buffer().flush()
+        self.stdout.write(", ".join(f"{status}: {count}" for status, count in sorted(stats.items())))
+        self.stdout.write(self.style.SUCCESS("Async reminder sender stopped gracefully."))
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management import BaseCommand
+
+from habits_tracker.cron_matrix import CronMatrix
+from habits_tracker.models import Habit
+
+
+class Command(BaseCommand):
+    help = "Shows the reminder load profile of all habits for the coming days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=1, help="Number of days to expand.")
+        parser.add_argument("--top", type=int, default=10, help="Number of the busiest minutes to show.")
+
+    def handle(self, *args, **options):
+        frequencies = Habit.objects.filter(pleasent=False).values_list("frequency", flat=True)
+        matrix = CronMatrix(frequencies.iterator(chunk_size=10000))
+        start = date.today() + timedelta(days=1)
+        profile = matrix.load_profile(start, options["days"])
+
+        self.stdout.write(f"Habits: {len(matrix)}, distinct schedules: {len(matrix.unique)}")
+        self.stdout.write(f"Reminders from {start} for {options['days']} day(s): {profile.sum()}")
+        origin = np.datetime64(start.isoformat(), "m")
+        for minute in np.argsort(profile, kind="stable")[::-1][:options["top"]]:
+            if profile[minute]:
+                self.stdout.write(f"{origin + minute}: {profile[minute]}")
+        self.stdout.write(self.style.SUCCESS("Load profile computed successfully."))
@@ -0,0 +1,140 @@
+# Generated by Django 4.2 on 2026-10-18 06:56
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+# Копия habits_tracker.cron на момент миграции: миграция не должна зависеть от текущего кода приложения.
+WEEKDAY_NUMBERS = {
+    "Воскресенье": 0,
+    "Понедельник": 1,
+    "Вторник": 2,
+    "Среда": 3,
+    "Четверг": 4,
+    "Пятница": 5,
+    "Суббота": 6,
+}
+
+# Сколько дней вперед искать ближайшее срабатывание: покрывает любую комбинацию дня месяца и месяца.
+SEARCH_DAYS = 366 * 4
+
+
+def parse_field(value: str, low: int, high: int, names: dict | None = None) -> frozenset[int]:
+    """Разбор одного поля crontab в множество подходящих значений."""
+    values = set()
+    for part in value.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(bound) for bound in part.split("-"))
+        else:
+            start = names[part] if names and part in names else int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or step < 1:
+            raise ValueError(f"Некорректное значение поля crontab: {value}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Расписание в формате crontab: минута, час, день месяца, месяц, день недели."""
+
+    def __init__(self, crontab: str):
+        minute, hour, day_of_month, month_of_year, day_of_week = crontab.split()
+        self.minutes = sorted(parse_field(minute, 0, 59))
+        self.hours = sorted(parse_field(hour, 0, 23))
+        self.days_of_month = parse_field(day_of_month, 1, 31)
+        self.months = parse_field(month_of_year, 1, 12)
+        self.days_of_week = frozenset(day % 7 for day in parse_field(day_of_week, 0, 7, WEEKDAY_NUMBERS))
+        self.any_day_of_month = day_of_month == "*"
+        self.any_day_of_week = day_of_week == "*"
+
+    def day_matches(self, day) -> bool:
+        """Проверяет, может ли расписание сработать в указанный день."""
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days_of_month
+        in_week = (day.weekday() + 1) % 7 in self.days_of_week
+        if self.any_day_of_month or self.any_day_of_week:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after: datetime, tz: ZoneInfo | None = None) -> datetime | None:
+        """Ближайшее время срабатывания строго после указанного момента."""
+        tz = tz or ZoneInfo(settings.CELERY_TIMEZONE)
+        start = after.astimezone(tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(SEARCH_DAYS):
+            if self.day_matches(day):
+                for hour in self.hours:
+                    if day == start.date() and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if day == start.date() and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime.combine(day, time(hour, minute), tzinfo=tz)
+            day += timedelta(days=1)
+        return None
+
+
+def next_run_at(crontab: str | None, after: datetime) -> datetime | None:
+    """Время следующего напоминания для crontab или None, если строка не является расписанием."""
+    try:
+        return CronSchedule(crontab).next_after(after)
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+def fill_next_run_at(apps, schema_editor):
+    """Заполняет время следующего напоминания для существующих полезных привычек пачками."""
+    Habit = apps.get_model("habits_tracker", "Habit")
+    now = timezone.now()
+    next_times, batch = {}, []
+    habits = Habit.objects.filter(pleasent=False).only("pk", "frequency").order_by("pk")
+    for habit in habits.iterator(chunk_size=BATCH_SIZE):
+        if habit.frequency not in next_times:
+            next_times[habit.frequency] = next_run_at(habit.frequency, now)
+        habit.next_run_at = next_times[habit.frequency]
+        batch.append(habit)
+        if len(batch) == BATCH_SIZE:
+            Habit.objects.bulk_update(batch, ["next_run_at"])
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["next_run_at"])
+
+
+def disable_habit_tasks(apps, schema_editor):
+    """Отключает периодические задачи отдельных привычек: напоминания теперь рассылает диспетчер."""
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(task="habits_tracker.tasks.send_message").update(enabled=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0002_initial"),
+        ("django_celery_beat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="next_run_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                null=True,
+                verbose_name="Время следующего напоминания",
+            ),
+        ),
+        migrations.RunPython(fill_next_run_at, migrations.RunPython.noop),
+        migrations.RunPython(disable_habit_tasks, migrations.RunPython.noop),
+    ]
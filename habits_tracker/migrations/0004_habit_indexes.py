@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("habits_tracker", "0003_habit_next_run_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(fields=["user", "id"], name="habit_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(
+                condition=models.Q(("publicity", True)),
+                fields=["id"],
+                name="habit_public_id_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="habit",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="habits",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0004_habit_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="max_lateness",
+            field=models.PositiveIntegerField(
+                blank=True,
+                null=True,
+                verbose_name="Допустимое опоздание напоминания, секунд",
+            ),
+        ),
+    ]
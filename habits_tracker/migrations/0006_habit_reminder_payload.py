@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def build_reminder_payload(chat_id, action, place, reward):
+    """Копия habits_tracker.models.build_reminder_payload на момент миграции."""
+    if not chat_id:
+        return None
+    return {"chat_id": chat_id, "text": f"Веремя выполнить: {action} в {place}! Награда за выполнение: {reward}."}
+
+
+def fill_reminder_payload(apps, schema_editor):
+    """Заполняет снимки напоминаний существующих полезных привычек пачками."""
+    Habit = apps.get_model("habits_tracker", "Habit")
+    batch = []
+    habits = Habit.objects.filter(pleasent=False, user__isnull=False).select_related("user", "related_habits")
+    for habit in habits.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        reward = habit.reward if habit.reward else habit.related_habits.action if habit.related_habits else None
+        habit.reminder_payload = build_reminder_payload(habit.user.telegram_id, habit.action, habit.place, reward)
+        batch.append(habit)
+        if len(batch) == BATCH_SIZE:
+            Habit.objects.bulk_update(batch, ["reminder_payload"])
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_payload"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0005_habit_max_lateness"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="reminder_payload",
+            field=models.JSONField(
+                blank=True, editable=False, null=True, verbose_name="Снимок напоминания"
+            ),
+        ),
+        migrations.RunPython(fill_reminder_payload, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 4.2 on 2026-10-18 07:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0006_habit_reminder_payload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReminderDeliveryHour",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(unique=True, verbose_name="Час")),
+                (
+                    "sent",
+                    models.PositiveIntegerField(default=0, verbose_name="Отправлено"),
+                ),
+                (
+                    "failed",
+                    models.PositiveIntegerField(default=0, verbose_name="Ошибок"),
+                ),
+                (
+                    "throttled",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Ограничено Telegram"
+                    ),
+                ),
+                (
+                    "latency_histogram",
+                    models.JSONField(
+                        default=list, verbose_name="Гистограмма времени ответа"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сводка отправок за час",
+                "verbose_name_plural": "Сводки отправок за час",
+            },
+        ),
+        migrations.CreateModel(
+            name="ReminderDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "chat_id",
+                    models.CharField(max_length=50, verbose_name="Telegram ID"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("sent", "Отправлено"),
+                            ("failed", "Ошибка"),
+                            ("throttled", "Ограничено Telegram"),
+                        ],
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Код ответа"
+                    ),
+                ),
+                (
+                    "error",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="Ошибка"
+                    ),
+                ),
+                (
+                    "retry_after",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Повтор через, секунд"
+                    ),
+                ),
+                (
+                    "latency",
+                    models.FloatField(default=0, verbose_name="Время ответа, секунд"),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="Время отправки")),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="habits_tracker.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Отправка напоминания",
+                "verbose_name_plural": "Отправки напоминаний",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reminderdelivery",
+            index=models.Index(fields=["created_at"], name="delivery_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reminderdelivery",
+            index=models.Index(
+                fields=["habit", "created_at"], name="delivery_habit_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 4.2 on 2026-10-18 07:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0007_reminder_delivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HabitStreak",
+            fields=[
+                (
+                    "habit",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="streak",
+                        serialize=False,
+                        to="habits_tracker.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+                (
+                    "current",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Текущая серия"
+                    ),
+                ),
+                (
+                    "longest",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Самая длинная серия"
+                    ),
+                ),
+                (
+                    "completions",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Всего выполнений"
+                    ),
+                ),
+                (
+                    "first_date",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Первое выполнение"
+                    ),
+                ),
+                (
+                    "last_date",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Последнее выполнение"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Серия выполнений привычки",
+                "verbose_name_plural": "Серии выполнений привычек",
+            },
+        ),
+        migrations.CreateModel(
+            name="HabitCompletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата выполнения")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время отметки"
+                    ),
+                ),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completions",
+                        to="habits_tracker.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Выполнение привычки",
+                "verbose_name_plural": "Выполнения привычек",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="habitcompletion",
+            constraint=models.UniqueConstraint(
+                fields=("habit", "date"), name="completion_habit_date_uniq"
+            ),
+        ),
+    ]
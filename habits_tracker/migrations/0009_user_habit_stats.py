@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-18 07:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("habits_tracker", "0008_habit_completion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserHabitStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="habit_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Всего привычек"
+                    ),
+                ),
+                (
+                    "pleasant",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Приятных привычек"
+                    ),
+                ),
+                (
+                    "useful",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Полезных привычек"
+                    ),
+                ),
+                (
+                    "public",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Публичных привычек"
+                    ),
+                ),
+                (
+                    "frequencies",
+                    models.JSONField(
+                        default=dict, verbose_name="Привычек по шаблонам частоты"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Время обновления"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сводка привычек пользователя",
+                "verbose_name_plural": "Сводки привычек пользователей",
+            },
+        ),
+    ]
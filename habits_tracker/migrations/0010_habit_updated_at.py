@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits_tracker", "0009_user_habit_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Время изменения"),
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(
+                fields=["user", "updated_at"], name="habit_user_updated_idx"
+            ),
+        ),
+    ]
@@ -1,8 +1,20 @@
 from django.db import models
+from django.utils import timezone
 from config.settings import HABIT_FREQUENCY
 
+from habits_tracker.cron import next_run_at
 from users.models import User
 
+SCHEDULE_FIELDS = ("frequency", "pleasent")
+REMINDER_FIELDS = ("user_id", "action", "place", "reward", "related_habits_id", "pleasent")
+
+
+def build_reminder_payload(chat_id: str | None, action: str, place: str, reward: str | None) -> dict | None:
+    """Готовое к отправке напоминание: чат пользователя и текст. None, если у пользователя нет Telegram."""
+    if not chat_id:
+        return None
+    return {"chat_id": chat_id, "text": f"Веремя выполнить: {action} в {place}! Награда за выполнение: {reward}."}
+
 
 class Day(models.Model):
     day = models.CharField(max_length=100, unique=True, verbose_name="День недели", null=True, blank=True)
@@ -11,7 +23,7 @@ class Day(models.Model):
 class Habit(models.Model):
     """Класс привычки."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь', related_name='habits',
-                             null=True, blank=True)
+                             null=True, blank=True, db_index=False)
     time = models.DateTimeField(verbose_name='Время', null=True, blank=True)
     place = models.CharField(max_length=50, verbose_name='Место', null=True, blank=True)
     action = models.CharField(max_length=50, verbose_name='Действие', null=True, blank=True)
@@ -45,7 +57,196 @@ class Habit(models.Model):
         null=True,
         blank=True,
     )
+    max_lateness = models.PositiveIntegerField(
+        verbose_name="Допустимое опоздание напоминания, секунд",
+        null=True,
+        blank=True,
+    )
+    next_run_at = models.DateTimeField(
+        verbose_name="Время следующего напоминания",
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
+    reminder_payload = models.JSONField(
+        verbose_name="Снимок напоминания",
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Привычка'
         verbose_name_plural = 'Привычки'
+        indexes = [
+            models.Index(fields=["user", "id"], name="habit_user_id_idx"),
+            models.Index(fields=["id"], condition=models.Q(publicity=True), name="habit_public_id_idx"),
+            models.Index(fields=["user", "updated_at"], name="habit_user_updated_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, field: str):
+        """Значение поля на момент загрузки из базы данных (None для новой привычки)."""
+        return getattr(self, "_loaded_values", {}).get(field)
+
+    def _changed(self, fields) -> bool:
+        return any(self.__dict__.get(field) != self.loaded_value(field) for field in fields)
+
+    def schedule_changed(self) -> bool:
+        """Нужно ли пересчитать время следующего напоминания: оно не рассчитано или изменилось расписание."""
+        return self.next_run_at is None or self._changed(SCHEDULE_FIELDS)
+
+    def refresh_next_run_at(self) -> None:
+        """Пересчитывает время следующего напоминания по текущему расписанию."""
+        self.next_run_at = None if self.pleasent else next_run_at(self.frequency, timezone.now())
+
+    def refresh_reminder_payload(self) -> None:
+        """Пересчитывает снимок напоминания, чтобы отправка не загружала привычку, пользователя и награду."""
+        if self.pleasent or self.user_id is None:
+            self.reminder_payload = None
+            return
+        reward = self.reward if self.reward else self.related_habits.action if self.related_habits_id else None
+        self.reminder_payload = build_reminder_payload(self.user.telegram_id, self.action, self.place, reward)
+
+    def save(self, *args, **kwargs):
+        refreshed = set()
+        if self.schedule_changed():
+            self.refresh_next_run_at()
+            refreshed.add("next_run_at")
+        if self._state.adding or self._changed(REMINDER_FIELDS):
+            self.refresh_reminder_payload()
+            refreshed.add("reminder_payload")
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], *refreshed, "updated_at"}
+        action_changed = not self._state.adding and self._changed(("action",))
+
+        super().save(*args, **kwargs)
+        if action_changed:
+            refresh_reminder_payloads(Habit.objects.filter(related_habits=self))
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+
+def refresh_reminder_payloads(habits) -> None:
+    """Пересчитывает снимки напоминаний привычек из queryset одним массовым обновлением.
+
+    Время изменения привычек тоже обновляется: ETag и Last-Modified учитывают, например, обнуление
+    связанной привычки при ее удалении.
+    """
+    habits = list(habits.select_related("user", "related_habits"))
+    now = timezone.now()
+    for habit in habits:
+        habit.refresh_reminder_payload()
+        habit.updated_at = now
+    Habit.objects.bulk_update(habits, ["reminder_payload", "updated_at"], batch_size=500)
+
+
+class ReminderDelivery(models.Model):
+    """Результат отправки одного напоминания."""
+    STATUSES = (("sent", "Отправлено"), ("failed", "Ошибка"), ("throttled", "Ограничено Telegram"))
+
+    habit = models.ForeignKey(Habit, on_delete=models.SET_NULL, verbose_name="Привычка", null=True, blank=True,
+                              db_index=False, db_constraint=False)
+    chat_id = models.CharField(max_length=50, verbose_name="Telegram ID")
+    status = models.CharField(max_length=10, choices=STATUSES, verbose_name="Статус")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Код ответа", null=True, blank=True)
+    error = models.CharField(max_length=255, verbose_name="Ошибка", null=True, blank=True)
+    retry_after = models.PositiveIntegerField(verbose_name="Повтор через, секунд", null=True, blank=True)
+    latency = models.FloatField(verbose_name="Время ответа, секунд", default=0)
+    created_at = models.DateTimeField(verbose_name="Время отправки")
+
+    class Meta:
+        verbose_name = "Отправка напоминания"
+        verbose_name_plural = "Отправки напоминаний"
+        indexes = [
+            models.Index(fields=["created_at"], name="delivery_created_idx"),
+            models.Index(fields=["habit", "created_at"], name="delivery_habit_created_idx"),
+        ]
+
+
+class ReminderDeliveryHour(models.Model):
+    """Сводка отправок напоминаний за час: счетчики статусов и гистограмма времени ответа."""
+    hour = models.DateTimeField(unique=True, verbose_name="Час")
+    sent = models.PositiveIntegerField(default=0, verbose_name="Отправлено")
+    failed = models.PositiveIntegerField(default=0, verbose_name="Ошибок")
+    throttled = models.PositiveIntegerField(default=0, verbose_name="Ограничено Telegram")
+    latency_histogram = models.JSONField(default=list, verbose_name="Гистограмма времени ответа")
+
+    class Meta:
+        verbose_name = "Сводка отправок за час"
+        verbose_name_plural = "Сводки отправок за час"
+
+
+class HabitCompletion(models.Model):
+    """Отметка о выполнении привычки за день."""
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, verbose_name="Привычка", related_name="completions")
+    date = models.DateField(verbose_name="Дата выполнения")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время отметки")
+
+    class Meta:
+        verbose_name = "Выполнение привычки"
+        verbose_name_plural = "Выполнения привычек"
+        constraints = [models.UniqueConstraint(fields=["habit", "date"], name="completion_habit_date_uniq")]
+
+
+class HabitStreak(models.Model):
+    """Счетчики серии выполнений привычки, обновляемые при каждой отметке без пересчета истории.
+
+    gap - наибольший допустимый перерыв между выполнениями в днях: для ежедневной привычки 1,
+    для привычки через день 2, для привычки по выбранным дням недели - наибольший промежуток между ними.
+    """
+    habit = models.OneToOneField(Habit, on_delete=models.CASCADE, primary_key=True, verbose_name="Привычка",
+                                 related_name="streak")
+    current = models.PositiveIntegerField(default=0, verbose_name="Текущая серия")
+    longest = models.PositiveIntegerField(default=0, verbose_name="Самая длинная серия")
+    completions = models.PositiveIntegerField(default=0, verbose_name="Всего выполнений")
+    first_date = models.DateField(null=True, blank=True, verbose_name="Первое выполнение")
+    last_date = models.DateField(null=True, blank=True, verbose_name="Последнее выполнение")
+
+    class Meta:
+        verbose_name = "Серия выполнений привычки"
+        verbose_name_plural = "Серии выполнений привычек"
+
+    def apply(self, day, gap: int = 1) -> None:
+        """Учитывает выполнение за день не раньше последнего учтенного."""
+        if self.last_date is not None and (day - self.last_date).days <= gap:
+            self.current += 1
+        else:
+            self.current = 1
+        if self.first_date is None:
+            self.first_date = day
+        self.last_date = day
+        self.longest = max(self.longest, self.current)
+        self.completions += 1
+
+    def current_on(self, today, gap: int = 1) -> int:
+        """Текущая серия на дату: серия прерывается, если с последнего выполнения прошло больше gap дней."""
+        if self.last_date is None or (today - self.last_date).days > gap:
+            return 0
+        return self.current
+
+
+class UserHabitStats(models.Model):
+    """Сводка привычек пользователя, обновляемая при изменении привычек."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, verbose_name="Пользователь",
+                                related_name="habit_stats")
+    total = models.PositiveIntegerField(default=0, verbose_name="Всего привычек")
+    pleasant = models.PositiveIntegerField(default=0, verbose_name="Приятных привычек")
+    useful = models.PositiveIntegerField(default=0, verbose_name="Полезных привычек")
+    public = models.PositiveIntegerField(default=0, verbose_name="Публичных привычек")
+    frequencies = models.JSONField(default=dict, verbose_name="Привычек по шаблонам частоты")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время обновления")
+
+    class Meta:
+        verbose_name = "Сводка привычек пользователя"
+        verbose_name_plural = "Сводки привычек пользователей"
@@ -1,8 +1,28 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CountHintPaginator(Paginator):
+    """Пагинатор, принимающий уже известное число объектов (атрибут count_hint выборки) без COUNT-запроса."""
+
+    @cached_property
+    def count(self):
+        count_hint = getattr(self.object_list, "count_hint", None)
+        return super().count if count_hint is None else count_hint
 
 
 class HabitPaginator(PageNumberPagination):
     """Пагинация страниц списка привычек."""
+    django_paginator_class = CountHintPaginator
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 10
+
+
+class HabitCursorPaginator(CursorPagination):
+    """Курсорная пагинация списка привычек по первичному ключу: страница выбирается по индексу, без OFFSET."""
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 10
+    ordering = 'id'
@@ -0,0 +1,35 @@
+import json
+
+import redis
+
+from config.settings import REMINDER_QUEUE_URL
+
+QUEUE_KEY = "reminders:due"
+
+# Атомарно забирает до ARGV[2] напоминаний со временем отправки не позже ARGV[1]: будущие напоминания
+# не покидают очередь, поэтому не теряются при сбое отправителя.
+FETCH_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+
+def get_client(url: str = REMINDER_QUEUE_URL) -> redis.Redis:
+    return redis.Redis.from_url(url)
+
+
+def encode(reminder: dict) -> str:
+    return json.dumps(reminder, ensure_ascii=False, sort_keys=True)
+
+
+def enqueue(items: list[tuple[dict, float]], client: redis.Redis | None = None) -> None:
+    """Кладет напоминания в очередь асинхронного отправителя: пары (напоминание, время отправки в unix time).
+
+    Очередь - сортированное множество Redis, поэтому отложенная отправка работает так же, как countdown
+    у задач Celery, а повторно поставленное напоминание не дублируется.
+    """
+    if items:
+        (client or get_client()).zadd(QUEUE_KEY, {encode(reminder): send_at for reminder, send_at in items})
@@ -1,26 +1,109 @@
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
 
-from habits_tracker.models import Habit
+from habits_tracker.models import Habit, UserHabitStats
+from habits_tracker.services import save_habit
 from habits_tracker.validators import HabitValidator
 
 
 class HabitSerializer(serializers.ModelSerializer):
     class Meta:
         model = Habit
-        fields = '__all__'
+        # Служебные поля планировщика и снимок напоминания в ответы API не входят.
+        exclude = ("next_run_at", "updated_at", "reminder_payload")
         validators = [HabitValidator()]
 
     def to_internal_value(self, data):
         if self.instance:
-            if not data.get("days_of week"):
+            if "days_of_week" not in data:
                 data["days_of_week"] = [day.pk for day in self.instance.days_of_week.all()]
             for field in self.fields.keys():
                 if field not in data.keys():
                     data[field] = getattr(self.instance, field)
         return data
 
+    def create(self, validated_data):
+        return save_habit(Habit(), validated_data)
+
+    def update(self, instance, validated_data):
+        return save_habit(instance, validated_data)
+
 
 class PublicHabitSerializer(HabitSerializer):
     class Meta(HabitSerializer.Meta):
         model = Habit
+        exclude = None
         fields = ("action", "pleasent", "execution_time")
+
+
+class HabitCompletionSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+
+    def validate_date(self, value):
+        if value > timezone.localdate():
+            raise serializers.ValidationError("Нельзя отметить выполнение привычки в будущем.")
+        return value
+
+
+class UserHabitStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserHabitStats
+        fields = ("total", "pleasant", "useful", "public", "frequencies", "updated_at")
+
+
+# Поля, представление которых для значений из базы данных совпадает с самим значением.
+PLAIN_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.ReadOnlyField, PrimaryKeyRelatedField,
+)
+
+
+class RowSerializer:
+    """Быстрое представление привычек только для чтения по строкам .values().
+
+    Поля serializer_class разбираются один раз: для каждого поля запоминаются колонка и функция
+    преобразования (None для полей, значение которых выводится как есть). Вывод совпадает с выводом
+    serializer_class, но не создает объекты моделей и не вызывает to_representation каждого поля.
+    Связи многие-ко-многим по первичному ключу загружаются одним запросом к промежуточной таблице.
+    """
+
+    def __init__(self, serializer_class):
+        self.columns, self.many = [], {}
+        model = serializer_class.Meta.model
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, ManyRelatedField):
+                self.many[name] = getattr(model, field.source).through
+                self.columns.append((name, None, None))
+                continue
+            model_field = model._meta.get_field(field.source)
+            convert = None if isinstance(field, PLAIN_FIELDS) else field.to_representation
+            self.columns.append((name, model_field.attname, convert))
+        self.pk = model._meta.pk.attname
+        self.keys = list(dict.fromkeys([self.pk] + [key for name, key, convert in self.columns if key]))
+
+    def project(self, queryset):
+        """Выборка только колонок представления."""
+        return queryset.prefetch_related(None).values(*self.keys)
+
+    def many_ids(self, name, pks) -> dict[int, list]:
+        through = self.many[name]
+        source, target = (field.attname for field in through._meta.concrete_fields if field.is_relation)
+        ids = {}
+        for pk, related_pk in through.objects.filter(**{f"{source}__in": pks}).order_by(source, target).values_list(
+            source, target
+        ):
+            ids.setdefault(pk, []).append(related_pk)
+        return ids
+
+    def to_representation(self, rows) -> list[dict]:
+        rows = list(rows)
+        many = {name: self.many_ids(name, [row[self.pk] for row in rows]) for name in self.many} if rows else {}
+        return [
+            {
+                name: many[name].get(row[self.pk], []) if key is None
+                else row[key] if convert is None or row[key] is None else convert(row[key])
+                for name, key, convert in self.columns
+            }
+            for row in rows
+        ]
@@ -1,18 +1,24 @@
-import json
 from datetime import datetime
 
-from django_celery_beat.models import CrontabSchedule, PeriodicTask
+from django.db import models, transaction
+from django.utils import timezone
 
-from habits_tracker.models import Habit
+from habits_tracker import feed_cache, user_stats
+from habits_tracker.models import Day, Habit, refresh_reminder_payloads
 
 
-def create_replacements(habit: Habit) -> dict[str, str | list[str]]:
-    """Создание даты в формате словаря."""
-    m = datetime.fromisoformat(habit.time).time().minute
-    h = x = datetime.fromisoformat(habit.time).time().hour
-    y = datetime.fromisoformat(habit.end_time).time().hour if habit.end_time else 0
+def as_datetime(value: str | datetime) -> datetime:
+    """Время привычки из запроса (строка ISO 8601) или из базы данных (datetime)."""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def build_replacements(time, end_time, day_names: list[str]) -> dict[str, str]:
+    """Создание даты в формате словаря по времени начала, окончания и названиям дней."""
+    m = as_datetime(time).time().minute
+    h = x = as_datetime(time).time().hour
+    y = as_datetime(end_time).time().hour if end_time else 0
     z = (x + y) // 2
-    d = ",".join([day.day for day in habit.days_of_week.all()]) if habit.days_of_week else "d"
+    d = ",".join(day_names)
     return {"m": str(m), "x": str(x), "y": str(y), "z": str(z), "h": str(h), "d": d}
 
 
@@ -23,24 +29,117 @@ def make_replacements(text: str, replacements: dict) -> str:
     return text
 
 
-def create_schedule(crontab: str) -> CrontabSchedule:
-    """Cоздание задачи напоминания о привычке."""
-    minute, hour, day_of_month, month_of_year, day_of_week = crontab.split()
-    schedule, created = CrontabSchedule.objects.get_or_create(
-        minute=minute,
-        hour=hour,
-        day_of_week=day_of_week,
-        day_of_month=day_of_month,
-        month_of_year=month_of_year,
-    )
-    return schedule
-
-
-def create_task(schedule: CrontabSchedule, habit: Habit) -> None:
-    """Создание периодической задачи напоминания о привычке."""
-    PeriodicTask.objects.create(
-        crontab=schedule,
-        name=f"Отправка напоминания {habit.pk}",
-        task="habits_tracker.tasks.send_message",
-        args=json.dumps([habit.pk]),
-    )
+HABIT_FIELDS = {
+    name: field
+    for field in Habit._meta.concrete_fields
+    if field.editable and not field.primary_key
+    for name in {field.name, field.attname}
+}
+
+
+def assign_habit_fields(habit: Habit, attrs: dict) -> None:
+    """Переносит проверенные данные запроса в объект привычки без сохранения."""
+    for name, value in attrs.items():
+        field = HABIT_FIELDS.get(name)
+        if field is None:
+            continue
+        if field.is_relation and not isinstance(value, models.Model):
+            setattr(habit, field.attname, value)
+        else:
+            setattr(habit, name, value)
+
+
+def prepare_habit(habit: Habit, day_ids: list[int], days: dict[int, Day]) -> None:
+    """Подставляет время в шаблон частоты.
+
+    Время следующего напоминания пересчитывается только при изменении расписания (Habit.schedule_changed):
+    при сохранении через save это делает сама привычка, при массовом сохранении - bulk_save_habits.
+    """
+    if not habit.pleasent:
+        replacements = build_replacements(habit.time, habit.end_time, [days[pk].day for pk in day_ids if pk in days])
+        habit.frequency = make_replacements(habit.frequency, replacements)
+
+
+def save_habit(habit: Habit, attrs: dict) -> Habit:
+    """Сохраняет привычку одной записью: частота и время напоминания рассчитываются до сохранения.
+
+    Дни недели заменяются, если ключ days_of_week присутствует в данных. Запись привычки и ее дней
+    выполняется в одной транзакции.
+    """
+    assign_habit_fields(habit, attrs)
+    day_ids = attrs.get("days_of_week") or []
+    needs_days = day_ids and not habit.pleasent and "d" in (habit.frequency or "")
+    prepare_habit(habit, day_ids, Day.objects.in_bulk(day_ids) if needs_days else {})
+
+    with transaction.atomic():
+        habit.save()
+        if "days_of_week" in attrs:
+            habit.days_of_week.set(day_ids)
+    return habit
+
+
+def bulk_save_habits(
+    user, created: list[dict], updated: list[tuple[Habit, dict]], days: dict[int, Day] | None = None,
+    rebuild_stats: bool = True,
+) -> list[Habit]:
+    """Создает и обновляет привычки пользователя пачками в одной транзакции.
+
+    created - проверенные данные новых привычек, updated - пары (привычка, проверенные данные).
+    Дни недели переданных привычек заменяются, если ключ days_of_week присутствует в данных.
+    days - уже загруженные дни недели (Day.objects.in_bulk()), при rebuild_stats = False сводку
+    пользователя пересчитывает вызывающий код (например, после импорта всех пачек).
+    """
+    days = Day.objects.in_bulk() if days is None else days
+    Through = Habit.days_of_week.through
+    was_public = any(habit.publicity for habit, attrs in updated)
+
+    new_habits = []
+    for attrs in created:
+        habit = Habit()
+        assign_habit_fields(habit, attrs)
+        habit.user = user
+        prepare_habit(habit, attrs.get("days_of_week") or [], days)
+        new_habits.append(habit)
+
+    for habit, attrs in updated:
+        assign_habit_fields(habit, attrs)
+        habit.user = user
+        day_ids = attrs["days_of_week"] if "days_of_week" in attrs else [day.pk for day in habit.days_of_week.all()]
+        prepare_habit(habit, day_ids or [], days)
+
+    habits = new_habits + [habit for habit, attrs in updated]
+    for habit in habits:
+        if habit.schedule_changed():
+            habit.refresh_next_run_at()
+    related = Habit.objects.in_bulk({habit.related_habits_id for habit in habits if habit.related_habits_id})
+    for habit in habits:
+        if habit.related_habits_id in related:
+            habit.related_habits = related[habit.related_habits_id]
+        habit.refresh_reminder_payload()
+
+    with transaction.atomic():
+        Habit.objects.bulk_create(new_habits)
+        if updated:
+            now = timezone.now()
+            for habit, attrs in updated:
+                habit.updated_at = now
+            renamed = [habit.pk for habit, attrs in updated if habit._changed(("action",))]
+            fields = {field.name for field in HABIT_FIELDS.values()} | {"next_run_at", "reminder_payload", "updated_at"}
+            Habit.objects.bulk_update([habit for habit, attrs in updated], fields)
+            # Как и Habit.save: награда в снимках привычек, связанных с переименованными, берется из их действия.
+            if renamed:
+                refresh_reminder_payloads(Habit.objects.filter(related_habits__in=renamed))
+
+        replaced = [habit.pk for habit, attrs in updated if "days_of_week" in attrs]
+        Through.objects.filter(habit_id__in=replaced).delete()
+        links = [(habit.pk, attrs.get("days_of_week") or []) for habit, attrs in zip(new_habits, created)]
+        links += [(habit.pk, attrs["days_of_week"] or []) for habit, attrs in updated if "days_of_week" in attrs]
+        Through.objects.bulk_create(
+            Through(habit_id=habit_pk, day_id=day_pk) for habit_pk, day_ids in links for day_pk in day_ids
+        )
+
+    if feed_cache.is_enabled() and (was_public or any(habit.publicity for habit in habits)):
+        feed_cache.invalidate()
+    if habits and rebuild_stats:
+        user_stats.rebuild_users([user.pk])
+    return habits
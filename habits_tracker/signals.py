@@ -0,0 +1,104 @@
+from celery.signals import worker_process_init
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from habits_tracker import feed_cache, user_stats
+from habits_tracker.cron import warm_up
+from habits_tracker.models import Habit, refresh_reminder_payloads
+from users.models import User
+
+
+@receiver(post_save, sender=Habit)
+def invalidate_public_feed_on_save(sender, instance, **kwargs):
+    """Сбрасывает кеш публичной ленты, если привычка публична или была публичной до изменения."""
+    if feed_cache.is_enabled() and (instance.publicity or instance.loaded_value("publicity")):
+        feed_cache.invalidate()
+
+
+@receiver(post_delete, sender=Habit)
+def invalidate_public_feed_on_delete(sender, instance, **kwargs):
+    """Сбрасывает кеш публичной ленты при удалении публичной привычки."""
+    if feed_cache.is_enabled() and instance.publicity:
+        feed_cache.invalidate()
+
+
+def _deletion_origin(instance, origin):
+    """Объект, с которого началось удаление: привычка, пользователь или их queryset, иначе сама привычка."""
+    if isinstance(origin, (Habit, User)) or isinstance(origin, QuerySet) and origin.model in (Habit, User):
+        return origin
+    return instance
+
+
+def _rewarded_habits(origin):
+    """Привычки, для которых удаляемые приятные привычки служат наградой, - один запрос на все удаление."""
+    if isinstance(origin, Habit):
+        return Habit.objects.filter(related_habits=origin) if origin.pleasent else Habit.objects.none()
+    if isinstance(origin, User):
+        return Habit.objects.filter(related_habits__user=origin, related_habits__pleasent=True)
+    if origin.model is Habit:
+        return Habit.objects.filter(related_habits__in=origin.filter(pleasent=True).values("pk"))
+    return Habit.objects.filter(related_habits__user__in=origin.values("pk"), related_habits__pleasent=True)
+
+
+@receiver(pre_delete, sender=Habit)
+def remember_rewarded_habits(sender, instance, origin=None, **kwargs):
+    """Запоминает привычки, для которых удаляемые привычки служат наградой, один раз на все удаление."""
+    origin = _deletion_origin(instance, origin)
+    if "_rewarded_pks" not in origin.__dict__:
+        origin._rewarded_pks = list(_rewarded_habits(origin).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Habit)
+def refresh_rewarded_habits(sender, instance, origin=None, **kwargs):
+    """Обновляет снимки напоминаний и время изменения привычек, потерявших связанную привычку.
+
+    Связи к этому моменту уже обнулены для всего удаления, поэтому снимки обновляются при первом сигнале.
+    """
+    pks = _deletion_origin(instance, origin).__dict__.pop("_rewarded_pks", None)
+    if pks:
+        refresh_reminder_payloads(Habit.objects.filter(pk__in=pks))
+
+
+@receiver(post_save, sender=User)
+def refresh_user_reminders(sender, instance, created, update_fields=None, **kwargs):
+    """Обновляет снимки напоминаний привычек пользователя при возможной смене Telegram ID."""
+    if not created and (update_fields is None or "telegram_id" in update_fields):
+        refresh_reminder_payloads(instance.habits.all())
+
+
+@receiver(post_save, sender=Habit)
+def update_user_stats_on_save(sender, instance, created, **kwargs):
+    """Обновляет сводку привычек пользователя на разницу вкладов привычки до и после сохранения."""
+    new = user_stats.contribution(instance.pleasent, instance.publicity, instance.frequency)
+    if created:
+        user_stats.apply(instance.user_id, new)
+        return
+    if not hasattr(instance, "_loaded_values"):
+        # Привычка сохранена без загрузки из базы данных, прежний вклад неизвестен.
+        user_stats.rebuild_users([instance.user_id])
+        return
+
+    old_user_id = instance.loaded_value("user_id")
+    old = user_stats.contribution(
+        instance.loaded_value("pleasent"), instance.loaded_value("publicity"), instance.loaded_value("frequency")
+    )
+    if old_user_id == instance.user_id:
+        new.subtract(old)
+        user_stats.apply(instance.user_id, new)
+    else:
+        user_stats.apply(old_user_id, user_stats.negate(old), build_missing=False)
+        user_stats.apply(instance.user_id, new)
+
+
+@receiver(post_delete, sender=Habit)
+def update_user_stats_on_delete(sender, instance, **kwargs):
+    """Вычитает удаленную привычку из сводки пользователя (при удалении пользователя сводка удаляется вместе с ним)."""
+    contribution = user_stats.contribution(instance.pleasent, instance.publicity, instance.frequency)
+    user_stats.apply(instance.user_id, user_stats.negate(contribution), build_missing=False)
+
+
+@worker_process_init.connect
+def warm_up_schedule_cache(**kwargs):
+    """Заполняет кеш расписаний процесса воркера Celery всеми расписаниями привычек до первых задач."""
+    warm_up(Habit.objects.filter(pleasent=False).values_list("frequency", flat=True).distinct().iterator())
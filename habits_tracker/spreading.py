@@ -0,0 +1,35 @@
+from config.settings import REMINDER_SPREAD_BURST, REMINDER_SPREAD_RATE, REMINDER_SPREAD_WINDOW
+
+
+class TokenBucket:
+    """Корзина токенов на модельном времени: выдает момент, когда станет доступен следующий токен.
+
+    Сначала доступно burst токенов, затем корзина пополняется со скоростью rate токенов в секунду.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.time = 0.0
+
+    def reserve(self) -> float:
+        if self.tokens < 1:
+            self.time += (1 - self.tokens) / self.rate
+            self.tokens = 1.0
+        self.tokens -= 1
+        return self.time
+
+
+def spread(deadlines: list[float], window: float = REMINDER_SPREAD_WINDOW, rate: float = REMINDER_SPREAD_RATE,
+           burst: int = REMINDER_SPREAD_BURST) -> list[float]:
+    """Смещения отправки напоминаний в секундах от текущего момента.
+
+    deadlines - допустимая задержка каждого напоминания. Токены раздаются в порядке сроков, поэтому
+    напоминания с жестким сроком уходят первыми. Смещение не превышает ни окно, ни срок напоминания:
+    если темпа корзины не хватает, напоминание уходит в последний допустимый момент.
+    """
+    bucket = TokenBucket(rate, burst)
+    offsets = [0.0] * len(deadlines)
+    for index in sorted(range(len(deadlines)), key=deadlines.__getitem__):
+        offsets[index] = min(bucket.reserve(), window, max(deadlines[index], 0.0))
+    return offsets
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from rest_framework.serializers import ValidationError
+
+from config.settings import REMINDER_SCHEDULE_CACHE_SIZE
+from habits_tracker.cron import get_schedule
+from habits_tracker.models import Habit, HabitCompletion, HabitStreak
+
+PROFILE_START = date(2025, 1, 1)
+PROFILE_DAYS = 366 * 2
+
+
+@lru_cache(maxsize=REMINDER_SCHEDULE_CACHE_SIZE)
+def schedule_profile(crontab: str | None) -> tuple[int, float]:
+    """Наибольший промежуток между днями расписания в днях и доля дней, в которые оно срабатывает.
+
+    Для приятных привычек и нераспознанных расписаний считается, что привычка ежедневная.
+    """
+    schedule = get_schedule(crontab)
+    days = [
+        offset for offset in range(PROFILE_DAYS)
+        if schedule is not None and schedule.day_matches(PROFILE_START + timedelta(days=offset))
+    ]
+    if not days:
+        return 1, 1.0
+    gaps = [later - earlier for earlier, later in zip(days, days[1:])] + [days[0] + PROFILE_DAYS - days[-1]]
+    return max(gaps), len(days) / PROFILE_DAYS
+
+
+def rebuild(streak: HabitStreak, gap: int) -> None:
+    """Пересчитывает счетчики серии по всей истории выполнений (нужно только для отметок задним числом)."""
+    streak.current = streak.longest = streak.completions = 0
+    streak.first_date = streak.last_date = None
+    days = HabitCompletion.objects.filter(habit_id=streak.habit_id).order_by("date").values_list("date", flat=True)
+    for day in days.iterator():
+        streak.apply(day, gap)
+
+
+def mark_done(habit: Habit, day: date) -> HabitStreak:
+    """Отмечает выполнение привычки за день и обновляет счетчики серии за O(1)."""
+    gap, density = schedule_profile(habit.frequency)
+    with transaction.atomic():
+        streak, created = HabitStreak.objects.select_for_update().get_or_create(habit=habit)
+        if HabitCompletion.objects.filter(habit=habit, date=day).exists():
+            raise ValidationError({"date": "Привычка уже отмечена выполненной за этот день."})
+        HabitCompletion.objects.create(habit=habit, date=day)
+        if streak.last_date is None or day > streak.last_date:
+            streak.apply(day, gap)
+        else:
+            rebuild(streak, gap)
+        streak.save()
+    streak.habit = habit
+    return streak
+
+
+def get_stats(streak: HabitStreak, today: date) -> dict:
+    """Текущая и самая длинная серии и доля выполненных по расписанию дней с первого выполнения."""
+    gap, density = schedule_profile(streak.habit.frequency)
+    expected = max(1, round(((today - streak.first_date).days + 1) * density)) if streak.first_date else 0
+    return {
+        "habit": streak.habit_id,
+        "current_streak": streak.current_on(today, gap),
+        "longest_streak": streak.longest,
+        "completions": streak.completions,
+        "completion_rate": min(1.0, round(streak.completions / expected, 4)) if expected else None,
+        "first_date": streak.first_date,
+        "last_date": streak.last_date,
+    }
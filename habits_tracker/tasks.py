@@ -1,20 +1,95 @@
-import requests
 from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
 
-from config.settings import TELEGRAM_BOT_TOKEN
+from config.settings import (REMINDER_BATCH_SIZE, REMINDER_SENDER, REMINDER_SHARDS, REMINDER_SPREAD_ENABLED,
+                             REMINDER_SPREAD_WINDOW)
+from habits_tracker import beat_cleanup, delivery_log, reminder_queue
+from habits_tracker.cron import next_run_at
+from habits_tracker.delivery import Reminder, collect_reminders, get_engine
 from habits_tracker.models import Habit
+from habits_tracker.spreading import spread
 
 
 @shared_task
-def send_message(pk) -> None:
+def send_reminders(reminders: list[dict | int], shard: int = 0) -> list[dict]:
+    """Отправляет пачку напоминаний пользователям в Telegram.
+
+    reminders - готовые напоминания (Reminder.as_dict()), их отправка не обращается к базе данных.
+    Вместо напоминания можно передать pk привычки, тогда оно собирается из снимка привычки.
+    shard - номер шарда пользователей пачки, по нему задача направляется в очередь шарда (config/celery.py).
+    """
+    ready = [Reminder(**item) for item in reminders if isinstance(item, dict)]
+    pks = [item for item in reminders if not isinstance(item, dict)]
+    if pks:
+        ready += collect_reminders(pks)
+    results = get_engine().deliver(ready)
+    delivery_log.record(results)
+    return [result.as_dict() for result in results]
+
+
+@shared_task
+def send_message(pk) -> list[dict]:
     """Отправляет напоминание пользователю в Telegram."""
-    habit = Habit.objects.get(pk=pk)
-    text = (
-        f"Веремя выполнить: {habit.action} в {habit.place}! "
-        f"Награда за выполнение: {habit.reward if habit.reward else habit.related_habit}."
-    )
-    params = {
-        "text": text,
-        "chat_id": habit.user.telegram_id,
-    }
-    requests.get(f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage", params=params)
+    return send_reminders([pk])
+
+
+@shared_task
+def dispatch_due_reminders() -> int:
+    """Раз в минуту выбирает привычки с наступившим временем напоминания и отправляет их пачками.
+
+    Привычки распределяются по шардам по id пользователя: напоминания одного пользователя всегда
+    попадают в одну очередь, а пропускная способность растет с числом воркеров очередей шардов.
+    При REMINDER_SPREAD_ENABLED отправка растягивается на окно REMINDER_SPREAD_WINDOW с темпом корзины
+    токенов, не нарушая допустимое опоздание привычки (max_lateness). При REMINDER_SENDER = "async"
+    привычки вместо задач Celery попадают в очередь Redis асинхронного отправителя (run_async_sender).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            Habit.objects.select_for_update(skip_locked=True)
+            .filter(next_run_at__lte=now)
+            .values_list("pk", "frequency", "user_id", "next_run_at", "max_lateness", "reminder_payload")
+        )
+        next_times = {frequency: next_run_at(frequency, now) for frequency in {row[1] for row in due}}
+        Habit.objects.bulk_update(
+            [Habit(pk=pk, next_run_at=next_times[frequency]) for pk, frequency, *rest in due],
+            ["next_run_at"],
+            batch_size=REMINDER_BATCH_SIZE,
+        )
+    # Напоминания берутся из снимков привычек, пользователи без Telegram пропускаются.
+    reminders = [{"habit_pk": row[0], **row[5]} if row[5] else None for row in due]
+
+    if REMINDER_SPREAD_ENABLED:
+        deadlines = [
+            (REMINDER_SPREAD_WINDOW if max_lateness is None else max_lateness) - (now - due_at).total_seconds()
+            for pk, frequency, user_id, due_at, max_lateness, payload in due
+        ]
+        countdowns = [int(offset) for offset in spread(deadlines)]
+    else:
+        countdowns = [0] * len(due)
+
+    if REMINDER_SENDER == "async":
+        reminder_queue.enqueue([
+            (reminder, now.timestamp() + countdown) for reminder, countdown in zip(reminders, countdowns) if reminder
+        ])
+        return len(due)
+
+    batches = {}
+    for row, reminder, countdown in sorted(zip(due, reminders, countdowns), key=lambda item: (item[2], item[0][2])):
+        if reminder:
+            batches.setdefault((countdown, row[2] % REMINDER_SHARDS), []).append(reminder)
+    for (countdown, shard), items in batches.items():
+        for start in range(0, len(items), REMINDER_BATCH_SIZE):
+            chunk = items[start:start + REMINDER_BATCH_SIZE]
+            if countdown:
+                send_reminders.apply_async((chunk,), {"shard": shard}, countdown=countdown)
+            else:
+                send_reminders.delay(chunk, shard=shard)
+    return len(due)
+
+
+@shared_task
+def cleanup_beat_schedules() -> dict:
+    """Удаляет устаревшие периодические задачи привычек и неиспользуемые расписания."""
+    return beat_cleanup.sweep()
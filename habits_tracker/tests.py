@@ -1,10 +1,108 @@
+import asyncio
+import csv
+import json
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
+
+import numpy as np
+from config.celery import route_task
+from config.renderers import ORJSONParser, ORJSONRenderer
+from config.settings import REMINDER_SHARDS
+from celery.signals import worker_process_init
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_celery_beat.models import CrontabSchedule, PeriodicTask
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
-from habits_tracker.models import Habit, Day
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from habits_tracker import delivery_log
+from habits_tracker.async_sender import AsyncDeliveryEngine, AsyncReminderConsumer, AsyncTelegramClient
+from habits_tracker.beat_cleanup import sweep
+from habits_tracker.cron import CronSchedule, _interned_schedule, get_schedule, next_run_at, warm_up
+from habits_tracker.cron_matrix import CronMatrix
+from habits_tracker.delivery import (FAILED, SENT, THROTTLED, ChatRateLimiter, DeliveryEngine, DeliveryResult,
+                                     Reminder, TelegramClient, collect_reminders)
+from habits_tracker.export import iter_habits
+from habits_tracker.importer import import_habits
+from habits_tracker.models import (Day, Habit, HabitStreak, ReminderDelivery, ReminderDeliveryHour,
+                                   UserHabitStats)
+from habits_tracker.reminder_queue import FETCH_DUE_SCRIPT, encode
+from habits_tracker.serializers import HabitSerializer, PublicHabitSerializer, RowSerializer
+from habits_tracker.spreading import TokenBucket, spread
+from habits_tracker.streaks import schedule_profile
+from habits_tracker.tasks import dispatch_due_reminders, send_reminders
+from habits_tracker.user_stats import frequency_template, rebuild_users
+from habits_tracker.views import HabitListAPIView, PublicHabitListAPIView
 from users.models import User
 
 
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.calls.append((self.client_address, time.monotonic(), body))
+        if body["chat_id"] in self.server.throttled_chats:
+            status_code, payload = 429, {"ok": False, "description": "Too Many Requests",
+                                         "parameters": {"retry_after": self.server.retry_after}}
+            if self.server.throttle_once:
+                self.server.throttled_chats.discard(body["chat_id"])
+        else:
+            status_code, payload = 200, {"ok": True, "result": {}}
+        data = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeTelegramServer:
+    """Локальный сервер, имитирующий Telegram Bot API."""
+
+    def __init__(self, throttled_chats=(), retry_after=3, throttle_once=False):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegramHandler)
+        self.httpd.calls = []
+        self.httpd.throttled_chats = set(throttled_chats)
+        self.httpd.retry_after = retry_after
+        self.httpd.throttle_once = throttle_once
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    @property
+    def calls(self):
+        return self.httpd.calls
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
 class HabitTestCase(APITestCase):
 
     def setUp(self):
@@ -91,8 +189,9 @@ class HabitTestCase(APITestCase):
 
         self.assertEqual(request.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Habit.objects.all().count(), 5)
-        frequency = Habit.objects.get(place="Place 2").frequency
-        self.assertEqual(frequency, "30 16 * * *")
+        habit = Habit.objects.get(place="Place 2")
+        self.assertEqual(habit.frequency, "30 16 * * *")
+        self.assertEqual(habit.next_run_at, next_run_at("30 16 * * *", timezone.now()))
 
     def test_habit_create_good_habit_execution_time_error(self):
         url = reverse("habits_tracker:habit-create")
@@ -531,6 +630,7 @@ class HabitTestCase(APITestCase):
                         "reward": self.good_habit.reward,
                         "frequency": self.good_habit.frequency,
                         "end_time": None,
+                        "max_lateness": None,
                         "user": self.user.pk,
                         "related_habits": None,
                         "days_of_week": [],
@@ -546,6 +646,7 @@ class HabitTestCase(APITestCase):
                         "reward": None,
                         "frequency": "m h * * *",
                         "end_time": None,
+                        "max_lateness": None,
                         "user": self.user.pk,
                         "related_habits": None,
                         "days_of_week": [],
@@ -562,18 +663,22 @@ class HabitTestCase(APITestCase):
         self.assertEqual(request.status_code, status.HTTP_200_OK)
         self.assertEqual(
             response,
-            [
-                {
-                    "action": self.good_habit.action,
-                    "pleasent": self.good_habit.pleasent,
-                    "execution_time": self.good_habit.execution_time,
-                },
-                {
-                    "action": self.pleasant_habit2.action,
-                    "pleasent": self.pleasant_habit2.pleasent,
-                    "execution_time": self.pleasant_habit2.execution_time,
-                },
-            ],
+            {
+                "next": None,
+                "previous": None,
+                "results": [
+                    {
+                        "action": self.good_habit.action,
+                        "pleasent": self.good_habit.pleasent,
+                        "execution_time": self.good_habit.execution_time,
+                    },
+                    {
+                        "action": self.pleasant_habit2.action,
+                        "pleasent": self.pleasant_habit2.pleasent,
+                        "execution_time": self.pleasant_habit2.execution_time,
+                    },
+                ],
+            },
         )
 
     def test_habit_update(self):
@@ -600,3 +705,1400 @@ class HabitTestCase(APITestCase):
 
         self.assertEqual(request.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Habit.objects.all().count(), 3)
+
+
+class DeliveryEngineTestCase(TestCase):
+
+    def test_deliver_batch_over_pooled_connection(self):
+        reminders = [Reminder(habit_pk=pk, chat_id="100", text=f"Habit {pk}") for pk in range(3)]
+        with FakeTelegramServer() as server:
+            client = TelegramClient(token="test", base_url=server.url, pool_size=1)
+            engine = DeliveryEngine(client=client, concurrency=1, rate_limiter=ChatRateLimiter(interval=0))
+            results = engine.deliver(reminders)
+            client.close()
+
+        self.assertEqual([result.status for result in results], [SENT] * 3)
+        self.assertEqual([call[2]["text"] for call in server.calls], ["Habit 0", "Habit 1", "Habit 2"])
+        self.assertEqual(len({call[0] for call in server.calls}), 1)
+
+    def test_deliver_reports_throttled_messages(self):
+        reminders = [
+            Reminder(habit_pk=1, chat_id="100", text="Habit 1"),
+            Reminder(habit_pk=2, chat_id="200", text="Habit 2"),
+        ]
+        with FakeTelegramServer(throttled_chats={"200"}) as server:
+            engine = DeliveryEngine(client=TelegramClient(token="test", base_url=server.url), concurrency=2)
+            results = {result.habit_pk: result for result in engine.deliver(reminders)}
+
+        self.assertEqual(results[1].status, SENT)
+        self.assertEqual(results[2].status, THROTTLED)
+        self.assertEqual(results[2].status_code, 429)
+        self.assertEqual(results[2].retry_after, 3)
+
+    def test_deliver_rate_limits_messages_to_one_chat(self):
+        reminders = [Reminder(habit_pk=pk, chat_id="100", text=f"Habit {pk}") for pk in range(3)]
+        with FakeTelegramServer() as server:
+            engine = DeliveryEngine(client=TelegramClient(token="test", base_url=server.url), concurrency=4,
+                                    rate_limiter=ChatRateLimiter(interval=0.05))
+            engine.deliver(reminders)
+
+        sent_at = [call[1] for call in server.calls]
+        self.assertGreaterEqual(sent_at[1] - sent_at[0], 0.04)
+        self.assertGreaterEqual(sent_at[2] - sent_at[1], 0.04)
+
+    @mock.patch("habits_tracker.delivery.time.monotonic")
+    def test_rate_limiter_prunes_past_slots(self, monotonic):
+        monotonic.return_value = 1000.0
+        limiter = ChatRateLimiter(interval=1)
+        for chat_id in range(100):
+            self.assertEqual(limiter.reserve(str(chat_id)), 0)
+        self.assertEqual(limiter.reserve("0"), 1)
+        self.assertEqual(len(limiter._next_slot), 100)
+
+        monotonic.return_value += limiter.prune_interval
+        self.assertEqual(limiter.reserve("new"), 0)
+        self.assertEqual(list(limiter._next_slot), ["new"])
+
+    def test_collect_reminders(self):
+        user = User.objects.create(email="tg@user.ru", telegram_id="100")
+        silent_user = User.objects.create(email="silent@user.ru")
+        pleasant = Habit.objects.create(user=user, action="Pleasant action", pleasent=True)
+        habit = Habit.objects.create(user=user, place="Place", action="Action", related_habits=pleasant)
+        silent = Habit.objects.create(user=silent_user, place="Place", action="Action", reward="Reward")
+
+        with self.assertNumQueries(1):
+            reminders = collect_reminders([habit.pk, silent.pk])
+
+        self.assertEqual(len(reminders), 1)
+        self.assertEqual(reminders[0].chat_id, "100")
+        self.assertEqual(
+            reminders[0].text,
+            "Веремя выполнить: Action в Place! Награда за выполнение: Pleasant action.",
+        )
+
+
+def reminder_of(habit):
+    """Напоминание привычки в том виде, в каком его передает диспетчер."""
+    return {"habit_pk": habit.pk, **habit.reminder_payload}
+
+
+class FakeQueueRedis:
+    """Сортированное множество в памяти с нужными отправителю командами Redis."""
+
+    def __init__(self, items):
+        self.items = dict(items)
+        self.scripts = []
+
+    def register_script(self, script):
+        self.scripts.append(script)
+        return self.fetch_due
+
+    async def fetch_due(self, keys, args):
+        """FETCH_DUE_SCRIPT: до args[1] участников со временем не позже args[0]."""
+        now, count = args
+        due = sorted((score, member) for member, score in self.items.items() if score <= now)[:count]
+        for score, member in due:
+            del self.items[member]
+        return [member.encode() for score, member in due]
+
+    async def zadd(self, key, mapping):
+        self.items.update({member if isinstance(member, str) else member.decode(): score
+                           for member, score in mapping.items()})
+
+
+class AsyncSenderTestCase(TestCase):
+
+    async def deliver(self, url, reminders, **kwargs):
+        async with AsyncTelegramClient(token="test", base_url=url) as client:
+            engine = AsyncDeliveryEngine(client, rate_limiter=ChatRateLimiter(interval=0), **kwargs)
+            return await engine.deliver(reminders)
+
+    def test_deliver_batch(self):
+        reminders = [Reminder(habit_pk=pk, chat_id=str(pk), text=f"Habit {pk}") for pk in range(20)]
+        with FakeTelegramServer() as server:
+            results = asyncio.run(self.deliver(server.url, reminders, concurrency=5))
+
+        self.assertEqual([result.status for result in results], [SENT] * 20)
+        self.assertEqual(len(server.calls), 20)
+
+    def test_deliver_retries_after_retry_after(self):
+        reminders = [Reminder(habit_pk=1, chat_id="100", text="Habit 1")]
+        with FakeTelegramServer(throttled_chats={"100"}, retry_after=0, throttle_once=True) as server:
+            results = asyncio.run(self.deliver(server.url, reminders))
+
+        self.assertEqual(results[0].status, SENT)
+        self.assertEqual(len(server.calls), 2)
+
+    def test_deliver_gives_up_after_max_retries(self):
+        reminders = [Reminder(habit_pk=1, chat_id="100", text="Habit 1")]
+        with FakeTelegramServer(throttled_chats={"100"}, retry_after=0) as server:
+            results = asyncio.run(self.deliver(server.url, reminders, max_retries=2))
+
+        self.assertEqual(results[0].status, THROTTLED)
+        self.assertEqual(len(server.calls), 3)
+
+    @mock.patch("habits_tracker.async_sender.delivery_log.record")
+    def test_consumer_sends_due_reminders_and_stops(self, record):
+        due = Reminder(habit_pk=1, chat_id="100", text="Habit 1")
+        later = Reminder(habit_pk=2, chat_id="100", text="Habit 2")
+        redis = FakeQueueRedis({encode(due.as_dict()): time.time() - 1, encode(later.as_dict()): time.time() + 3600})
+
+        async def run(url):
+            async with AsyncTelegramClient(token="test", base_url=url) as client:
+                engine = AsyncDeliveryEngine(client, rate_limiter=ChatRateLimiter(interval=0))
+                consumer = AsyncReminderConsumer(engine, redis=redis, poll_interval=0.01)
+                asyncio.get_running_loop().call_later(0.5, consumer.stop)
+                return await consumer.run()
+
+        with FakeTelegramServer() as server, self.assertNumQueries(0):
+            stats = asyncio.run(run(server.url))
+
+        self.assertEqual(stats, {SENT: 1})
+        self.assertEqual([result.habit_pk for result in record.call_args.args[0]], [1])
+        self.assertEqual([call[2]["text"] for call in server.calls], ["Habit 1"])
+        self.assertEqual(list(redis.items), [encode(later.as_dict())])
+        self.assertEqual(redis.scripts, [FETCH_DUE_SCRIPT])
+
+    @mock.patch("habits_tracker.async_sender.delivery_log.record")
+    def test_consumer_requeues_only_unsent_reminders_on_shutdown(self, record):
+        reminders = [Reminder(habit_pk=1, chat_id="100", text="Habit 1"),
+                     Reminder(habit_pk=2, chat_id="200", text="Habit 2"),
+                     Reminder(habit_pk=3, chat_id="100", text="Habit 3")]
+        redis = FakeQueueRedis({encode(reminder.as_dict()): time.time() - 1 for reminder in reminders})
+
+        async def run(url):
+            async with AsyncTelegramClient(token="test", base_url=url) as client:
+                engine = AsyncDeliveryEngine(client, rate_limiter=ChatRateLimiter(interval=0))
+                consumer = AsyncReminderConsumer(engine, redis=redis, poll_interval=0.01, shutdown_timeout=0.2)
+                asyncio.get_running_loop().call_later(0.3, consumer.stop)
+                return await consumer.run()
+
+        # Чат 200 ждет повтора после 429 дольше shutdown_timeout, поэтому пачка прерывается на середине.
+        with FakeTelegramServer(throttled_chats={"200"}, retry_after=60) as server:
+            stats = asyncio.run(run(server.url))
+
+        self.assertEqual(stats, {SENT: 2, "requeued": 1})
+        record.assert_called_once()
+        self.assertEqual(sorted(result.habit_pk for result in record.call_args.args[0]), [1, 3])
+        self.assertEqual(list(redis.items), [encode(reminders[1].as_dict())])
+
+    @mock.patch("habits_tracker.tasks.REMINDER_SENDER", "async")
+    @mock.patch("habits_tracker.tasks.reminder_queue.enqueue")
+    def test_dispatch_enqueues_for_async_sender(self, enqueue):
+        user = User.objects.create(email="tg@user.ru", telegram_id="100")
+        habit = Habit.objects.create(user=user, action="Action", reward="Reward", frequency="30 16 * * *")
+        now = timezone.now()
+        Habit.objects.update(next_run_at=now)
+
+        with mock.patch("habits_tracker.tasks.timezone.now", return_value=now):
+            self.assertEqual(dispatch_due_reminders(), 1)
+
+        enqueue.assert_called_once_with([(reminder_of(habit), now.timestamp())])
+
+
+class ReminderPayloadTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="tg@user.ru", telegram_id="100")
+        self.pleasant = Habit.objects.create(user=self.user, action="Pleasant action", pleasent=True)
+        self.habit = Habit.objects.create(user=self.user, place="Place", action="Action", related_habits=self.pleasant)
+
+    def test_payload_on_create(self):
+        self.assertEqual(self.habit.reminder_payload, {
+            "chat_id": "100",
+            "text": "Веремя выполнить: Action в Place! Награда за выполнение: Pleasant action.",
+        })
+        self.assertIsNone(self.pleasant.reminder_payload)
+        silent = Habit.objects.create(user=User.objects.create(email="silent@user.ru"), action="Action")
+        self.assertIsNone(silent.reminder_payload)
+
+    def test_payload_refreshed_on_related_habit_change(self):
+        self.pleasant.action = "New action"
+        self.pleasant.save()
+        self.habit.refresh_from_db()
+        self.assertTrue(self.habit.reminder_payload["text"].endswith("Награда за выполнение: New action."))
+
+        self.pleasant.delete()
+        self.habit.refresh_from_db()
+        self.assertTrue(self.habit.reminder_payload["text"].endswith("Награда за выполнение: None."))
+
+    def test_rewarded_habits_looked_up_once_per_deletion(self):
+        counts = []
+        for size in (2, 10):
+            owner = User.objects.create(email=f"owner{size}@user.ru")
+            rewards = [Habit.objects.create(user=owner, action=f"Reward {n}", pleasent=True) for n in range(size)]
+            Habit.objects.create(user=owner, action="Useful", reward="Reward")
+            habits = [Habit.objects.create(user=self.user, place="Place", action="Action", related_habits=reward)
+                      for reward in rewards]
+            with CaptureQueriesContext(connection) as queries:
+                owner.delete()
+            # Сводка пользователя обновляется по каждой удаленной привычке, эти запросы не учитываются.
+            selects = [query for query in queries if query["sql"].startswith("SELECT")]
+            counts.append(len([query for query in selects if "userhabitstats" not in query["sql"]]))
+            for habit in habits:
+                habit.refresh_from_db()
+                self.assertTrue(habit.reminder_payload["text"].endswith("Награда за выполнение: None."))
+        self.assertEqual(counts[0], counts[1])
+
+        Habit.objects.filter(pk=self.pleasant.pk).delete()
+        self.habit.refresh_from_db()
+        self.assertTrue(self.habit.reminder_payload["text"].endswith("Награда за выполнение: None."))
+
+    def test_payload_refreshed_on_user_change(self):
+        self.user.telegram_id = "200"
+        self.user.save()
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.reminder_payload["chat_id"], "200")
+
+        self.user.telegram_id = None
+        self.user.save(update_fields=["telegram_id"])
+        self.habit.refresh_from_db()
+        self.assertIsNone(self.habit.reminder_payload)
+
+    @mock.patch("habits_tracker.tasks.get_engine")
+    def test_send_reminders_without_queries(self, get_engine):
+        get_engine.return_value.deliver.return_value = []
+        with self.assertNumQueries(0):
+            send_reminders([{"habit_pk": self.habit.pk, **self.habit.reminder_payload}])
+
+        get_engine.return_value.deliver.assert_called_once_with([Reminder(
+            habit_pk=self.habit.pk,
+            chat_id="100",
+            text="Веремя выполнить: Action в Place! Награда за выполнение: Pleasant action.",
+        )])
+
+
+class DeliveryLogTestCase(APITestCase):
+
+    def setUp(self):
+        self.hour = datetime(2025, 3, 31, 8, tzinfo=dt_timezone.utc)
+
+    def results(self, *latencies, status=SENT):
+        return [DeliveryResult(habit_pk=1, chat_id="100", status=status, latency=latency) for latency in latencies]
+
+    def test_write_logs_deliveries_and_hourly_summary(self):
+        delivery_log.write([(result, self.hour + timedelta(minutes=5)) for result in self.results(0.01, 0.2)])
+        delivery_log.write([(result, self.hour + timedelta(minutes=50)) for result in self.results(3, status=FAILED)])
+
+        self.assertEqual(ReminderDelivery.objects.count(), 3)
+        summary = ReminderDeliveryHour.objects.get()
+        self.assertEqual((summary.hour, summary.sent, summary.failed, summary.throttled), (self.hour, 2, 1, 0))
+        self.assertEqual(summary.latency_histogram, [1, 0, 0, 1, 0, 0, 0, 1, 0, 0])
+
+    def test_percentile(self):
+        histogram = [0, 0, 50, 50, 0, 0, 0, 0, 0, 0]
+        self.assertEqual(delivery_log.percentile(histogram, 50), 100)
+        self.assertEqual(delivery_log.percentile(histogram, 75), 175)
+        self.assertEqual(delivery_log.percentile([0] * 9 + [1], 99), 10000)
+        self.assertIsNone(delivery_log.percentile([0] * 10, 50))
+
+    @mock.patch("habits_tracker.delivery_log.write")
+    def test_buffer_flushes_in_batches(self, write):
+        buffer = delivery_log.DeliveryLogBuffer(flush_size=3, flush_interval=60)
+        buffer.add(self.results(0.1, 0.1))
+        write.assert_not_called()
+
+        buffer.add(self.results(0.1, 0.1))
+        self.assertEqual(len(write.call_args.args[0]), 4)
+        buffer.flush()
+        self.assertEqual(write.call_count, 1)
+
+    @mock.patch("habits_tracker.delivery_log.write")
+    def test_buffer_flushes_on_timer(self, write):
+        buffer = delivery_log.DeliveryLogBuffer(flush_size=100, flush_interval=0.05)
+        buffer.add(self.results(0.1))
+        time.sleep(0.3)
+        self.assertEqual(len(write.call_args.args[0]), 1)
+
+    @mock.patch("habits_tracker.tasks.delivery_log.record")
+    @mock.patch("habits_tracker.tasks.get_engine")
+    def test_send_reminders_records_results(self, get_engine, record):
+        get_engine.return_value.deliver.return_value = self.results(0.1)
+        send_reminders([{"habit_pk": 1, "chat_id": "100", "text": "Habit 1"}])
+        record.assert_called_once_with(self.results(0.1))
+
+    def test_delivery_stats(self):
+        now = timezone.now()
+        delivery_log.write([(result, now) for result in self.results(0.01, 0.01, 0.01)])
+        delivery_log.write([(result, now) for result in self.results(0.3, status=THROTTLED)])
+        url = reverse("habits_tracker:delivery-stats")
+
+        self.client.force_authenticate(User.objects.create(email="user@user.ru"))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(User.objects.create(email="admin@user.ru", is_staff=True))
+        response = self.client.get(url, {"hours": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.json()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual((stats[0]["total"], stats[0]["sent"], stats[0]["throttled"]), (4, 3, 1))
+        self.assertEqual(stats[0]["success_rate"], 0.75)
+        self.assertEqual(stats[0]["latency_p50_ms"], 16.7)
+        self.assertEqual(stats[0]["latency_p99_ms"], 490.0)
+
+
+class HabitStreakEngineTestCase(SimpleTestCase):
+
+    def test_apply(self):
+        streak = HabitStreak()
+        for day in (1, 2, 3, 5, 6, 7, 8, 20):
+            streak.apply(date(2025, 3, day))
+        self.assertEqual((streak.current, streak.longest, streak.completions), (1, 4, 8))
+        self.assertEqual((streak.first_date, streak.last_date), (date(2025, 3, 1), date(2025, 3, 20)))
+        self.assertEqual(streak.current_on(date(2025, 3, 21)), 1)
+        self.assertEqual(streak.current_on(date(2025, 3, 22)), 0)
+
+    def test_apply_with_gap(self):
+        streak = HabitStreak()
+        for day in (1, 3, 5, 8):
+            streak.apply(date(2025, 3, day), gap=2)
+        self.assertEqual((streak.current, streak.longest), (1, 3))
+
+    def test_schedule_profile(self):
+        self.assertEqual(schedule_profile("30 16 * * *"), (1, 1.0))
+        self.assertEqual(schedule_profile("30 16 */2 * *")[0], 2)
+        gap, density = schedule_profile("30 16 * * Понедельник,Среда")
+        self.assertEqual(gap, 5)
+        self.assertAlmostEqual(density, 2 / 7, places=2)
+        self.assertEqual(schedule_profile("m h * * *"), (1, 1.0))
+
+
+class HabitDoneTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.habit = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("habits_tracker:habit-done", args=(self.habit.pk,))
+        self.today = timezone.localdate()
+
+    def test_mark_done(self):
+        self.client.post(self.url, {"date": self.today - timedelta(days=1)})
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), {
+            "habit": self.habit.pk,
+            "current_streak": 2,
+            "longest_streak": 2,
+            "completions": 2,
+            "completion_rate": 1.0,
+            "first_date": str(self.today - timedelta(days=1)),
+            "last_date": str(self.today),
+        })
+        self.assertEqual(self.habit.completions.count(), 2)
+
+    def test_mark_done_rejects_duplicates_and_future(self):
+        self.client.post(self.url)
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"date": self.today + timedelta(days=1)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.habit.completions.count(), 1)
+
+    def test_backfill_rebuilds_streak(self):
+        for days_ago in (0, 3, 1):
+            self.client.post(self.url, {"date": self.today - timedelta(days=days_ago)})
+        response = self.client.post(self.url, {"date": self.today - timedelta(days=2)})
+
+        self.assertEqual(response.json()["current_streak"], 4)
+        self.assertEqual(response.json()["longest_streak"], 4)
+
+    def test_streak(self):
+        url = reverse("habits_tracker:habit-streak", args=(self.habit.pk,))
+        self.assertEqual(self.client.get(url).json()["current_streak"], 0)
+
+        self.client.post(self.url, {"date": self.today - timedelta(days=3)})
+        response = self.client.get(url)
+        self.assertEqual(response.json()["current_streak"], 0)
+        self.assertEqual(response.json()["longest_streak"], 1)
+        self.assertEqual(response.json()["completion_rate"], 0.25)
+
+    def test_mark_done_other_user(self):
+        self.client.force_authenticate(User.objects.create(email="other@user.ru"))
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UserHabitStatsTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("habits_tracker:habit-stats")
+
+    def create_habits(self):
+        Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *", publicity=True)
+        Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 8-20/2 * * *")
+        return Habit.objects.create(user=self.user, action="Pleasant action", pleasent=True)
+
+    def stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        del data["updated_at"]
+        return data
+
+    def test_frequency_template(self):
+        self.assertEqual(frequency_template("30 16 * * *"), "m h * * *")
+        self.assertEqual(frequency_template("0 8,14,20 * * *"), "m x,z,y * * *")
+        self.assertEqual(frequency_template("0 8-20/3 * * *"), "m x-y/3 * * *")
+        self.assertEqual(frequency_template("30 16 */2 * *"), "m h */2 * *")
+        self.assertEqual(frequency_template("30 16 * * Понедельник,Вторник"), "m h * * d")
+        self.assertEqual(frequency_template("m h * * *"), "m h * * *")
+        self.assertIsNone(frequency_template("0 0 1 1 *"))
+
+    def test_stats_updated_incrementally(self):
+        self.assertEqual(self.stats()["total"], 0)
+        pleasant = self.create_habits()
+        expected = {
+            "total": 3,
+            "pleasant": 1,
+            "useful": 2,
+            "public": 1,
+            "frequencies": {"m h * * *": 1, "m x-y/2 * * *": 1},
+        }
+        self.assertEqual(self.stats(), expected)
+
+        pleasant = Habit.objects.get(pk=pleasant.pk)
+        pleasant.publicity = True
+        pleasant.save()
+        self.assertEqual(self.stats()["public"], 2)
+
+        pleasant.delete()
+        self.assertEqual(self.stats(), {**expected, "total": 2, "pleasant": 0})
+
+    def test_stats_served_from_one_row(self):
+        self.create_habits()
+        self.stats()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_rebuild_command(self):
+        self.create_habits()
+        incremental = self.stats()
+        other = User.objects.create(email="other@user.ru")
+        Habit.objects.bulk_create([Habit(user=other, action="Action", pleasent=True)])
+
+        call_command("rebuild_habit_stats", chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(self.stats(), incremental)
+        self.assertEqual(incremental["frequencies"], {"m h * * *": 1, "m x-y/2 * * *": 1})
+        other_stats = UserHabitStats.objects.get(user=other)
+        self.assertEqual((other_stats.pleasant, other_stats.frequencies), (1, {}))
+
+
+class CronScheduleTestCase(SimpleTestCase):
+
+    def test_next_after_hour_range_with_step(self):
+        after = datetime(2025, 3, 30, 16, 45, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            CronSchedule("30 16-20/2 * * *").next_after(after),
+            datetime(2025, 3, 30, 18, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def test_next_after_rolls_over_to_next_day(self):
+        after = datetime(2025, 3, 30, 19, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            CronSchedule("30 16,18 * * *").next_after(after),
+            datetime(2025, 3, 31, 16, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def test_next_after_selected_days(self):
+        # 30.03.2025 - воскресенье.
+        after = datetime(2025, 3, 30, 12, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            CronSchedule("30 16 * * Вторник,Среда").next_after(after),
+            datetime(2025, 4, 1, 16, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def test_next_after_every_two_days(self):
+        after = datetime(2025, 3, 31, 17, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            CronSchedule("30 16 */2 * *").next_after(after),
+            datetime(2025, 4, 1, 16, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def test_next_run_at_unresolved_template(self):
+        self.assertIsNone(next_run_at("m h * * *", timezone.now()))
+        self.assertIsNone(next_run_at(None, timezone.now()))
+
+    def test_get_schedule_interned(self):
+        schedule = get_schedule("15 9 * * Понедельник")
+        self.assertIs(get_schedule("15  9 * *  Понедельник"), schedule)
+        self.assertIsNone(get_schedule("m h * * *"))
+
+    def test_warm_up_report(self):
+        report = warm_up(["0 8 * * *", "0  8 * * *", "m h * * *", None])
+        self.assertEqual(report["distinct"], 2)
+        self.assertEqual(report["valid"], 1)
+        self.assertEqual(report["invalid"], ["m h * * *"])
+        self.assertLessEqual(report["cached"], report["capacity"])
+
+
+class ScheduleCacheTestCase(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(email="user@user.ru")
+        for frequency in ("30 16 * * *", "0 9 * * *", "30 16 * * *", "m h * * *"):
+            Habit.objects.create(user=user, action="Action", reward="Reward", frequency=frequency)
+        _interned_schedule.cache_clear()
+
+    def test_worker_process_fills_schedule_cache(self):
+        worker_process_init.send(sender=None)
+        self.assertEqual(_interned_schedule.cache_info().currsize, 3)
+        get_schedule("30 16 * * *")
+        self.assertEqual(_interned_schedule.cache_info().hits, 1)
+
+    def test_check_schedules_command(self):
+        out = StringIO()
+        call_command("check_schedules", stdout=out)
+        self.assertIn("Distinct schedules: 3 (valid: 2)", out.getvalue())
+        self.assertIn("Invalid schedule: m h * * *", out.getvalue())
+
+
+class BeatCleanupTestCase(TestCase):
+
+    def setUp(self):
+        self.shared = CrontabSchedule.objects.create(minute="0", hour="8")
+        self.legacy = CrontabSchedule.objects.create(minute="30", hour="16")
+        self.unused = CrontabSchedule.objects.create(minute="15", hour="9")
+        PeriodicTask.objects.create(name="Отправка напоминания 1", task="habits_tracker.tasks.send_message",
+                                    crontab=self.legacy, args="[1]")
+        PeriodicTask.objects.create(name="Отправка напоминания 2", task="habits_tracker.tasks.send_message",
+                                    crontab=self.shared, args="[2]", enabled=False)
+        PeriodicTask.objects.create(name="Рассылка", task="habits_tracker.tasks.dispatch_due_reminders",
+                                    crontab=self.shared)
+
+    def test_sweep(self):
+        with mock.patch("django_celery_beat.models.PeriodicTasks.update_changed") as update_changed:
+            report = sweep(chunk_size=1)
+        update_changed.assert_called_once_with()
+        self.assertEqual(report["tasks"], 2)
+        self.assertEqual(report["enabled_tasks"], 1)
+        self.assertEqual(report["schedules"], 2)
+        self.assertEqual(report["remaining_tasks"], 1)
+        self.assertEqual(list(CrontabSchedule.objects.values_list("pk", flat=True)), [self.shared.pk])
+
+    def test_sweep_dry_run(self):
+        report = sweep(dry_run=True)
+        self.assertEqual((report["tasks"], report["schedules"]), (2, 2))
+        self.assertEqual(PeriodicTask.objects.count(), 3)
+        self.assertEqual(CrontabSchedule.objects.count(), 3)
+
+
+class DispatchDueRemindersTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="tg@user.ru", telegram_id="100")
+        self.now = timezone.now()
+        self.due = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+        self.later = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+        Habit.objects.filter(pk=self.due.pk).update(next_run_at=self.now - timedelta(minutes=1))
+        Habit.objects.filter(pk=self.later.pk).update(next_run_at=self.now + timedelta(hours=1))
+
+    @mock.patch("habits_tracker.tasks.send_reminders.delay")
+    def test_dispatch_sends_due_habits_and_advances_them(self, delay):
+        self.assertEqual(dispatch_due_reminders(), 1)
+
+        delay.assert_called_once_with([reminder_of(self.due)], shard=self.user.pk % REMINDER_SHARDS)
+        self.due.refresh_from_db()
+        self.assertGreater(self.due.next_run_at, self.now)
+        self.assertEqual(self.due.next_run_at.strftime("%H:%M"), "16:30")
+
+    @mock.patch("habits_tracker.tasks.send_reminders.delay")
+    def test_dispatch_batches_due_habits(self, delay):
+        Habit.objects.update(next_run_at=self.now - timedelta(minutes=1))
+
+        with mock.patch("habits_tracker.tasks.REMINDER_BATCH_SIZE", 1):
+            self.assertEqual(dispatch_due_reminders(), 2)
+
+        self.assertEqual(delay.call_count, 2)
+
+    @mock.patch("habits_tracker.tasks.send_reminders.delay")
+    def test_dispatch_shards_by_user(self, delay):
+        other = User.objects.create(email="tg2@user.ru", telegram_id="200")
+        habit = Habit.objects.create(user=other, action="Action", reward="Reward", frequency="30 16 * * *")
+        Habit.objects.update(next_run_at=self.now - timedelta(minutes=1))
+
+        with mock.patch("habits_tracker.tasks.REMINDER_SHARDS", 2):
+            self.assertEqual(dispatch_due_reminders(), 3)
+
+        calls = {call.kwargs["shard"]: call.args[0] for call in delay.call_args_list}
+        self.assertEqual([item["habit_pk"] for item in calls[self.user.pk % 2]], [self.due.pk, self.later.pk])
+        self.assertEqual(calls[other.pk % 2], [reminder_of(habit)])
+
+    def test_route_reminders_to_shard_queue(self):
+        route = route_task("habits_tracker.tasks.send_reminders", ([1],), {"shard": 3}, {})
+        self.assertEqual(route, {"queue": "reminders.3"})
+        self.assertEqual(route_task("habits_tracker.tasks.dispatch_due_reminders", (), {}, {}), {"queue": "celery"})
+
+
+class ReminderSpreadTestCase(SimpleTestCase):
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+    def test_spread_respects_deadlines_and_window(self):
+        offsets = spread([60, 60, 1, 60, 60], window=1.5, rate=1, burst=1)
+        self.assertEqual(offsets[2], 0.0)
+        self.assertEqual(sorted(offsets), [0.0, 1.0, 1.5, 1.5, 1.5])
+        self.assertEqual(spread([-5], window=60, rate=1, burst=0), [0.0])
+
+
+class DispatchSpreadTestCase(TestCase):
+
+    @mock.patch("habits_tracker.tasks.REMINDER_SPREAD_ENABLED", True)
+    @mock.patch("habits_tracker.tasks.send_reminders.apply_async")
+    @mock.patch("habits_tracker.tasks.send_reminders.delay")
+    def test_dispatch_spreads_with_countdown(self, delay, apply_async):
+        user = User.objects.create(email="tg@user.ru", telegram_id="100")
+        first = Habit.objects.create(user=user, action="Action", reward="Reward", frequency="30 16 * * *")
+        second = Habit.objects.create(user=user, action="Action", reward="Reward", frequency="30 16 * * *",
+                                      max_lateness=600)
+        Habit.objects.update(next_run_at=timezone.now())
+
+        with mock.patch("habits_tracker.tasks.spread", partial(spread, rate=0.1, burst=1)):
+            self.assertEqual(dispatch_due_reminders(), 2)
+
+        delay.assert_called_once_with([reminder_of(first)], shard=user.pk % REMINDER_SHARDS)
+        apply_async.assert_called_once_with(([reminder_of(second)],), {"shard": user.pk % REMINDER_SHARDS},
+                                            countdown=10)
+
+
+class HabitNextRunAtTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+
+    def test_next_run_at_computed_on_create(self):
+        habit = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+        pleasant = Habit.objects.create(user=self.user, action="Action", pleasent=True)
+
+        self.assertEqual(habit.next_run_at, next_run_at("30 16 * * *", timezone.now()))
+        self.assertIsNone(pleasant.next_run_at)
+
+    def test_next_run_at_kept_when_schedule_unchanged(self):
+        habit = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+        due_at = timezone.now() - timedelta(minutes=1)
+        Habit.objects.filter(pk=habit.pk).update(next_run_at=due_at)
+
+        habit = Habit.objects.get(pk=habit.pk)
+        habit.place = "Place"
+        habit.save()
+
+        habit.refresh_from_db()
+        self.assertEqual(habit.next_run_at, due_at)
+
+    def test_next_run_at_recomputed_when_schedule_changes(self):
+        habit = Habit.objects.create(user=self.user, action="Action", reward="Reward", frequency="30 16 * * *")
+
+        habit = Habit.objects.get(pk=habit.pk)
+        habit.frequency = "45 9 * * *"
+        habit.save(update_fields=["frequency"])
+
+        habit.refresh_from_db()
+        self.assertEqual(habit.next_run_at.strftime("%H:%M"), "09:45")
+
+        habit.pleasent = True
+        habit.save()
+
+        habit.refresh_from_db()
+        self.assertIsNone(habit.next_run_at)
+
+
+class CronMatrixTestCase(SimpleTestCase):
+    crontabs = [
+        "30 16 * * *",
+        "0 8-20/3 * * *",
+        "15 9,14,19 * * *",
+        "30 16 */2 * *",
+        "45 7 * * Понедельник,Пятница",
+        "30 16 * * *",
+        "m h * * *",
+        None,
+    ]
+
+    def scalar_fire_times(self, crontab, start, days):
+        schedule = CronSchedule(crontab)
+        moment = datetime.combine(start, datetime.min.time(), tzinfo=dt_timezone.utc) - timedelta(minutes=1)
+        end = moment + timedelta(days=days)
+        times = []
+        while (moment := schedule.next_after(moment)) <= end:
+            times.append(np.datetime64(moment.replace(tzinfo=None), "m"))
+        return times
+
+    def test_fire_times_match_scalar_schedule(self):
+        start = date(2025, 3, 30)
+        matrix = CronMatrix(self.crontabs)
+        habits, times = matrix.fire_times(start, days=7)
+
+        for index, crontab in enumerate(self.crontabs[:6]):
+            self.assertEqual(sorted(times[habits == index]), self.scalar_fire_times(crontab, start, 7))
+        self.assertFalse(np.isin([6, 7], habits).any())
+
+    def test_load_profile_counts_habits_per_minute(self):
+        # 31.03.2025 - понедельник и нечетное число.
+        profile = CronMatrix(self.crontabs).load_profile(date(2025, 3, 31))
+
+        self.assertEqual(profile[16 * 60 + 30], 3)
+        self.assertEqual(profile[7 * 60 + 45], 1)
+        self.assertEqual(profile.sum(), 3 + 5 + 3 + 1)
+
+    def test_next_fire_matches_scalar_schedule(self):
+        after = datetime(2025, 3, 30, 16, 30, tzinfo=dt_timezone.utc)
+        result = CronMatrix(self.crontabs).next_fire(after)
+
+        for index, crontab in enumerate(self.crontabs[:6]):
+            expected = CronSchedule(crontab).next_after(after).replace(tzinfo=None)
+            self.assertEqual(result[index], np.datetime64(expected, "m"))
+        self.assertTrue(np.isnat(result[6:]).all())
+
+
+class HabitListQueriesTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        days = [Day.objects.create(day="Понедельник"), Day.objects.create(day="Вторник")]
+        for number in range(12):
+            habit = Habit.objects.create(
+                user=self.user,
+                action=f"Action {number}",
+                frequency="30 16 * * Понедельник,Вторник",
+                publicity=True,
+            )
+            habit.days_of_week.set(days)
+        pleasant = Habit.objects.create(user=self.user, pleasent=True, publicity=True)
+        Habit.objects.exclude(pk=pleasant.pk).update(related_habits=pleasant)
+        self.client.force_authenticate(user=self.user)
+
+    def test_habit_list_query_count_does_not_depend_on_page_size(self):
+        url = reverse("habits_tracker:habit-list")
+        for page_size in (1, 5, 10):
+            with self.assertNumQueries(3):
+                response = self.client.get(url, {"page_size": page_size})
+            self.assertEqual(len(response.json()["results"]), page_size)
+            self.assertEqual(response.json()["results"][0]["days_of_week"], [day.pk for day in Day.objects.all()])
+
+    def test_public_habit_list_query_count(self):
+        url = reverse("habits_tracker:public-habit-list")
+        for page_size in (1, 5, 10):
+            with self.assertNumQueries(1):
+                response = self.client.get(url, {"page_size": page_size})
+            self.assertEqual(len(response.json()["results"]), page_size)
+
+    def test_habit_list_cursor_pagination(self):
+        url = reverse("habits_tracker:habit-list")
+        response = self.client.get(url, {"pagination": "cursor", "page_size": 5}).json()
+        ids = [habit["id"] for habit in response["results"]]
+        while response["next"]:
+            response = self.client.get(response["next"]).json()
+            ids.extend(habit["id"] for habit in response["results"])
+
+        self.assertNotIn("count", response)
+        self.assertEqual(ids, list(Habit.objects.filter(user=self.user).order_by("id").values_list("id", flat=True)))
+
+    def test_public_habit_list_cursor_pagination(self):
+        url = reverse("habits_tracker:public-habit-list")
+        response = self.client.get(url, {"page_size": 10}).json()
+        self.assertEqual(len(response["results"]), 10)
+
+        response = self.client.get(response["next"]).json()
+        self.assertEqual(len(response["results"]), 3)
+        self.assertIsNone(response["next"])
+
+
+class HabitConditionalGetTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.other = User.objects.create(email="other@user.ru")
+        self.habits = [Habit.objects.create(user=self.user, action=f"Action {number}") for number in range(3)]
+        self.client.force_authenticate(user=self.user)
+
+    def test_habit_list_not_modified(self):
+        url = reverse("habits_tracker:habit-list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.client.get(url, {"page": 2, "page_size": 2})["ETag"], etag)
+
+    def test_habit_list_etag_changes(self):
+        url = reverse("habits_tracker:habit-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.habits[0].action = "Changed"
+        self.habits[0].save(update_fields=["action"])
+        updated = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+
+        self.habits[1].delete()
+        deleted = self.client.get(url, HTTP_IF_NONE_MATCH=updated["ETag"])
+        self.assertEqual(deleted.status_code, status.HTTP_200_OK)
+        self.assertEqual(deleted.json()["count"], 2)
+
+    def test_habit_detail_not_modified(self):
+        url = reverse("habits_tracker:habit-detail", args=(self.habits[0].pk,))
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+    def test_etag_changes_when_related_habit_is_deleted(self):
+        pleasant = Habit.objects.create(user=self.other, action="Reward", pleasent=True)
+        habit = self.habits[0]
+        habit.related_habits = pleasant
+        habit.save()
+        detail_url = reverse("habits_tracker:habit-detail", args=(habit.pk,))
+        list_url = reverse("habits_tracker:habit-list")
+        detail, listing = self.client.get(detail_url), self.client.get(list_url)
+        self.assertEqual(detail.json()["related_habits"], pleasant.pk)
+
+        pleasant.delete()
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()["related_habits"])
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=listing["ETag"]).status_code, 200)
+
+    def test_foreign_habit_detail_has_no_etag(self):
+        habit = Habit.objects.create(user=self.other, action="Foreign")
+        response = self.client.get(reverse("habits_tracker:habit-detail", args=(habit.pk,)))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotIn("ETag", response)
+
+
+class RowSerializerTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        days = [Day.objects.create(day="Понедельник"), Day.objects.create(day="Вторник")]
+        pleasant = Habit.objects.create(user=self.user, pleasent=True, publicity=True)
+        for number in range(3):
+            habit = Habit.objects.create(
+                user=self.user,
+                action=f"Action {number}",
+                place="Home",
+                time=datetime(2025, 3, 30, 16, 30, tzinfo=dt_timezone.utc),
+                end_time=datetime(2025, 3, 30, 20, 30, 15, 250, tzinfo=dt_timezone.utc),
+                frequency="30 16 * * Понедельник,Вторник",
+                related_habits=pleasant,
+                max_lateness=60,
+            )
+            habit.days_of_week.set(days[number:])
+
+    def assert_same_output(self, serializer_class, queryset):
+        rows = RowSerializer(serializer_class)
+        self.assertEqual(
+            JSONRenderer().render(rows.to_representation(rows.project(queryset))),
+            JSONRenderer().render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_habit_rows_are_byte_identical(self):
+        self.assert_same_output(HabitSerializer, Habit.objects.prefetch_related("days_of_week").order_by("id"))
+
+    def test_public_habit_rows_are_byte_identical(self):
+        self.assert_same_output(PublicHabitSerializer, Habit.objects.filter(publicity=True).order_by("id"))
+
+    def test_rows_query_count(self):
+        rows = RowSerializer(HabitSerializer)
+        with self.assertNumQueries(2):
+            rows.to_representation(rows.project(Habit.objects.all()))
+
+
+class HabitExportTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.other = User.objects.create(email="other@user.ru")
+        self.admin = User.objects.create(email="admin@user.ru", is_staff=True)
+        days = [Day.objects.create(day="Понедельник"), Day.objects.create(day="Вторник")]
+        for number in range(5):
+            habit = Habit.objects.create(user=self.user, action=f"Action {number}", frequency="30 16 * * *")
+            habit.days_of_week.set(days[:number % 3])
+        Habit.objects.create(user=self.other, action="Other")
+        self.url = reverse("habits_tracker:habit-export")
+        self.client.force_authenticate(user=self.user)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_matches_habit_serializer(self):
+        response, content = self.export()
+        expected = HabitSerializer(
+            Habit.objects.filter(user=self.user).prefetch_related("days_of_week").order_by("id"), many=True
+        ).data
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in content.splitlines()], json.loads(json.dumps(expected)))
+
+    def test_csv_export(self):
+        response, content = self.export(export_format="csv")
+        lines = list(csv.DictReader(StringIO(content)))
+        self.assertIn('filename="habits.csv"', response["Content-Disposition"])
+        self.assertEqual([line["action"] for line in lines], [f"Action {number}" for number in range(5)])
+        self.assertEqual(lines[2]["days_of_week"], ",".join(str(day.pk) for day in Day.objects.order_by("id")))
+        self.assertEqual(lines[0]["end_time"], "")
+
+    def test_admin_exports_all_or_one_user(self):
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(len(self.export()[1].splitlines()), 6)
+        self.assertEqual(len(self.export(user=self.other.pk)[1].splitlines()), 1)
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(len(self.export(user=self.other.pk)[1].splitlines()), 5)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url, {"export_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_reads_in_chunks(self):
+        with self.assertNumQueries(4):
+            habits = list(iter_habits(Habit.objects.filter(user=self.user), chunk_size=2))
+        self.assertEqual(len(habits), 5)
+
+
+class HabitImportTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.mon = Day.objects.create(day="Понедельник")
+        self.tue = Day.objects.create(day="Вторник")
+        self.pleasant = Habit.objects.create(user=self.user, pleasent=True)
+        self.client.force_authenticate(user=self.user)
+
+    def row(self, number, **kwargs):
+        row = {
+            "place": "Home",
+            "time": "2025-03-30T16:30:00+03:00",
+            "action": f"Action {number}",
+            "frequency": "m h * * d",
+            "reward": "Reward",
+            "execution_time": 90,
+            "days_of_week": [self.mon.pk, self.tue.pk],
+        }
+        row.update(kwargs)
+        return row
+
+    def ndjson(self, rows) -> BytesIO:
+        return BytesIO("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode())
+
+    def test_import_export_round_trip(self):
+        other = User.objects.create(email="other@user.ru")
+        Habit.objects.create(user=self.user, action="Action", time=timezone.now(), frequency="0 9 * * *",
+                             related_habits=self.pleasant)
+        content = b"".join(self.client.get(reverse("habits_tracker:habit-export"))).decode()
+
+        stats = UserHabitStats.objects.create(user=other)
+        lines = [json.loads(line) for line in content.splitlines()]
+        # Связанная привычка другого пользователя не переносится, вместо нее указывается награда.
+        lines[1].update(related_habits=None, reward="Reward")
+        report = import_habits(other, self.ndjson(lines), "ndjson")
+
+        self.assertEqual((report["rows"], report["imported"], report["skipped"]), (2, 2, 0))
+        imported = Habit.objects.filter(user=other).order_by("id")
+        self.assertEqual([(habit.action, habit.pleasent, habit.frequency) for habit in imported],
+                         [(None, True, "m h * * *"), ("Action", False, "0 9 * * *")])
+        self.assertIsNotNone(imported[1].next_run_at)
+        stats.refresh_from_db()
+        self.assertEqual(stats.total, 2)
+
+    def test_bad_rows_are_skipped(self):
+        foreign = Habit.objects.create(user=User.objects.create(email="other@user.ru"), pleasent=True)
+        rows = [
+            self.row(1),
+            self.row(2, execution_time=125),
+            self.row(3, days_of_week=["Среда"]),
+            self.row(4, reward=None, related_habits=foreign.pk),
+            self.row(5, days_of_week=["Понедельник"], reward=None, related_habits=self.pleasant.pk),
+        ]
+        stream = BytesIO(self.ndjson(rows).getvalue() + b"{broken\n")
+        errors = []
+        report = import_habits(self.user, stream, "ndjson", chunk_size=2, on_error=lambda *error: errors.append(error))
+
+        self.assertEqual((report["rows"], report["imported"], report["skipped"]), (6, 2, 4))
+        self.assertEqual([line for line, message in errors], [2, 3, 4, 6])
+        self.assertEqual(errors[0][1], "Время выполнения привычки не может быть больше 120 секунд!")
+        self.assertEqual(report["errors"][1], {"line": 3, "error": "Неизвестный день недели: Среда."})
+        habit = Habit.objects.get(user=self.user, action="Action 5")
+        self.assertEqual(habit.frequency, "30 16 * * Понедельник")
+        self.assertEqual(habit.related_habits, self.pleasant)
+        self.assertEqual(list(habit.days_of_week.all()), [self.mon])
+
+    def test_upload_csv(self):
+        content = (
+            "action,place,time,frequency,reward,execution_time,pleasent,days_of_week\n"
+            f"Run,Park,2025-03-30T07:00:00,m h * * d,Coffee,60,False,\"{self.mon.pk},{self.tue.pk}\"\n"
+            "Read,Home,,m h * * *,Tea,30,false,\n"
+        )
+        upload = SimpleUploadedFile("habits.csv", content.encode(), content_type="text/csv")
+        response = self.client.post(reverse("habits_tracker:habit-import"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["imported"], 1)
+        self.assertEqual(response.json()["errors"][0]["line"], 3)
+        habit = Habit.objects.get(action="Run")
+        self.assertEqual(habit.frequency, "0 7 * * Понедельник,Вторник")
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+            file.write(self.ndjson([self.row(1), self.row(2)]).getvalue())
+            file.flush()
+            out = StringIO()
+            call_command("import_habits", file.name, user=self.user.email, chunk_size=1, stdout=out)
+
+        self.assertIn("imported 2, skipped 0", out.getvalue())
+        self.assertEqual(Habit.objects.filter(user=self.user, pleasent=False).count(), 2)
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    data = {
+        "frequency": "30 16 * * Понедельник,Вторник",
+        "time": datetime(2025, 3, 30, 16, 30, 0, 250, tzinfo=dt_timezone.utc),
+        "local": datetime(2025, 3, 30, 16, 30, tzinfo=timezone.get_fixed_timezone(180)),
+        "naive": datetime(2025, 3, 30, 16, 30),
+        "date": date(2025, 3, 30),
+        "delta": timedelta(minutes=5),
+        "price": Decimal("1.50"),
+        "errors": [ErrorDetail("Ошибка\u2028строки", code="invalid")],
+        "counts": {1: 2, "3": [4.5, None, True]},
+    }
+
+    def test_output_matches_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent_and_missing_orjson_fall_back(self):
+        expected = JSONRenderer().render(self.data, "application/json; indent=2")
+        self.assertEqual(ORJSONRenderer().render(self.data, "application/json; indent=2"), expected)
+        with mock.patch("config.renderers.orjson", None):
+            self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_parser(self):
+        content = '{"frequency": "30 16 * * Понедельник", "days_of_week": [1, 2]}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(content)), {"frequency": "30 16 * * Понедельник",
+                                                                  "days_of_week": [1, 2]})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"frequency": '))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"execution_time": NaN}'))
+
+
+class HabitIndexUsageTestCase(TestCase):
+    """Проверка планов запросов списков привычек на большом сгенерированном наборе данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(User(email=f"user{number}@user.ru") for number in range(50))
+        Habit.objects.bulk_create(
+            (
+                Habit(user=users[number % 50], action=f"Action {number}", publicity=number % 20 == 0,
+                      next_run_at=timezone.now() + timedelta(minutes=number))
+                for number in range(10000)
+            ),
+            batch_size=2000,
+        )
+        cls.user = users[0]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def view_queryset(self, view_class):
+        view = view_class()
+        view.request = Request(APIRequestFactory().get("/"))
+        view.request.user = self.user
+        return view.get_queryset()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn("TEMP B-TREE", plan.upper())
+
+    def test_habit_list_uses_user_id_index(self):
+        queryset = self.view_queryset(HabitListAPIView)
+        self.assertUsesIndex(queryset[:10], "habit_user_id_idx")
+        self.assertUsesIndex(queryset.filter(id__gt=5000)[:10], "habit_user_id_idx")
+
+    def test_public_habit_list_uses_partial_index(self):
+        queryset = self.view_queryset(PublicHabitListAPIView)
+        self.assertUsesIndex(queryset.order_by("id").filter(id__gt=5000)[:10], "habit_public_id_idx")
+
+    def test_due_reminders_use_next_run_at_index(self):
+        queryset = Habit.objects.filter(next_run_at__lte=timezone.now() + timedelta(minutes=5))
+        self.assertUsesIndex(queryset.values_list("pk", "frequency"), "next_run_at")
+
+
+@override_settings(CACHE_ENABLED=True)
+class PublicHabitFeedCacheTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="user@user.ru")
+        self.public = Habit.objects.create(user=self.user, action="Public", pleasent=True, publicity=True)
+        self.private = Habit.objects.create(user=self.user, action="Private", pleasent=True)
+        self.url = reverse("habits_tracker:public-habit-list")
+        self.client.force_authenticate(user=self.user)
+
+    def get_actions(self, expected_cache):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], expected_cache)
+        return [habit["action"] for habit in response.json()["results"]]
+
+    def test_feed_is_served_from_cache(self):
+        self.assertEqual(self.get_actions("MISS"), ["Public"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_actions("HIT"), ["Public"])
+
+    def test_private_habit_change_keeps_cache(self):
+        self.get_actions("MISS")
+        self.private.action = "Private changed"
+        self.private.save()
+
+        self.get_actions("HIT")
+
+    def test_public_habit_changes_invalidate_cache(self):
+        self.get_actions("MISS")
+        self.public.action = "Public changed"
+        self.public.save()
+        self.assertEqual(self.get_actions("MISS"), ["Public changed"])
+
+        private = Habit.objects.get(pk=self.private.pk)
+        private.publicity = True
+        private.save()
+        self.assertEqual(self.get_actions("MISS"), ["Public changed", "Private"])
+
+        private = Habit.objects.get(pk=self.private.pk)
+        private.publicity = False
+        private.save()
+        self.assertEqual(self.get_actions("MISS"), ["Public changed"])
+
+        self.public.delete()
+        self.assertEqual(self.get_actions("MISS"), [])
+
+    def test_cache_stats(self):
+        self.get_actions("MISS")
+        self.get_actions("HIT")
+        url = reverse("habits_tracker:public-habit-cache")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=User.objects.create(email="admin@user.ru", is_staff=True))
+        response = self.client.get(url).json()
+        self.assertEqual(response["hits"], 1)
+        self.assertEqual(response["misses"], 1)
+        self.assertEqual(response["hit_rate"], 0.5)
+
+
+class HabitBulkTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        self.mon = Day.objects.create(pk=1, day="Понедельник")
+        self.tue = Day.objects.create(pk=2, day="Вторник")
+        self.url = reverse("habits_tracker:habit-bulk")
+        self.client.force_authenticate(user=self.user)
+
+    def habit_body(self, number, **kwargs):
+        body = {
+            "place": f"Place {number}",
+            "time": "2025-03-30T16:30:00+03:00",
+            "action": f"Action {number}",
+            "pleasent": False,
+            "frequency": "m h * * d",
+            "reward": "Reward",
+            "execution_time": 90,
+            "days_of_week": [1, 2],
+        }
+        body.update(kwargs)
+        return body
+
+    def test_bulk_create(self):
+        response = self.client.post(self.url, [self.habit_body(1), self.habit_body(2, frequency="m h * * *",
+                                                                                   days_of_week=[])], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([habit["frequency"] for habit in response.json()],
+                         ["30 16 * * Понедельник,Вторник", "30 16 * * *"])
+        self.assertEqual([habit["days_of_week"] for habit in response.json()], [[1, 2], []])
+        habits = Habit.objects.filter(user=self.user)
+        self.assertEqual(habits.count(), 2)
+        self.assertFalse(habits.filter(next_run_at__isnull=True).exists())
+
+    def test_bulk_create_query_count_does_not_depend_on_size(self):
+        counts = []
+        for size in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, [self.habit_body(n) for n in range(size)], format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_update_query_count_does_not_depend_on_size(self):
+        pleasant = Habit.objects.create(user=self.user, action="Reward", pleasent=True)
+        counts = []
+        for size in (2, 20):
+            habits = [Habit.objects.create(user=self.user, place="Old", action=f"Action {n}", related_habits=pleasant,
+                                           time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+                      for n in range(size)]
+            items = [{"id": habit.pk, "place": "New", "related_habits_id": pleasant.pk} for habit in habits]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, items, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_related_habits_are_loaded_once(self):
+        pleasant = Habit.objects.create(user=self.user, pleasent=True)
+        useful = Habit.objects.create(user=self.user, action="Useful", pleasent=False)
+        counts = []
+        for size in (2, 20):
+            items = [self.habit_body(n, related_habit_id=pleasant.pk) for n in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, items, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+        response = self.client.post(
+            self.url,
+            [self.habit_body(1, related_habit_id=useful.pk), self.habit_body(2, related_habit_id=100500)],
+            format="json",
+        )
+        self.assertEqual(response.json()["errors"], [
+            {"non_field_errors": ["Только приятные привычки могут быть связанными!"]},
+            {"non_field_errors": ["Связанная привычка не найдена!"]},
+        ])
+
+    def test_bulk_reports_errors_per_item_and_writes_nothing(self):
+        response = self.client.post(
+            self.url,
+            [self.habit_body(1), self.habit_body(2, execution_time=125), self.habit_body(3)],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["errors"],
+            [{}, {"non_field_errors": ["Время выполнения привычки не может быть больше 120 секунд!"]}, {}],
+        )
+        self.assertFalse(Habit.objects.exists())
+
+    def test_bulk_update(self):
+        habit = Habit.objects.create(user=self.user, place="Old", action="Action", reward="Reward",
+                                     time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+        foreign = Habit.objects.create(user=User.objects.create(email="user2@user.ru"), action="Foreign")
+
+        response = self.client.post(self.url, [{"id": habit.pk, "place": "New", "frequency": "m h */2 * *",
+                                                "time": "2025-03-30T09:15:00+03:00"}, {"id": foreign.pk}],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"], [{}, {"id": ["Привычка не найдена."]}])
+
+        response = self.client.post(self.url, [{"id": habit.pk, "place": "New", "frequency": "m h */2 * *",
+                                                "time": "2025-03-30T09:15:00+03:00"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        habit.refresh_from_db()
+        self.assertEqual(habit.place, "New")
+        self.assertEqual(habit.frequency, "15 9 */2 * *")
+        self.assertEqual(habit.next_run_at.strftime("%H:%M"), "09:15")
+
+    def test_bulk_update_ids_are_checked(self):
+        habit = Habit.objects.create(user=self.user, place="Old", action="Action", reward="Reward",
+                                     time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+        body = {"place": "New", "frequency": "m h * * *", "days_of_week": []}
+
+        response = self.client.post(self.url, [{"id": "abc", **body}, {"id": 1.5, **body}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"], [{"id": ["Некорректный id привычки."]}] * 2)
+
+        response = self.client.post(self.url, [{"id": str(habit.pk), **body}, {"id": habit.pk, **body}],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"], [{}, {"id": ["Привычка указана в запросе несколько раз."]}])
+
+        response = self.client.post(self.url, [{"id": str(habit.pk), **body}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        habit.refresh_from_db()
+        self.assertEqual(habit.place, "New")
+
+    def test_bulk_rename_refreshes_linked_payloads(self):
+        self.user.telegram_id = "100"
+        self.user.save()
+        pleasant = Habit.objects.create(user=self.user, action="Old", pleasent=True)
+        habit = Habit.objects.create(user=self.user, place="Home", action="Action", related_habits=pleasant,
+                                     time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+        self.assertTrue(habit.reminder_payload["text"].endswith("Награда за выполнение: Old."))
+
+        response = self.client.post(self.url, [{"id": pleasant.pk, "action": "New", "frequency": None}],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        habit.refresh_from_db()
+        self.assertTrue(habit.reminder_payload["text"].endswith("Награда за выполнение: New."))
+
+
+class HabitWriteQueriesTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@user.ru")
+        Day.objects.create(pk=1, day="Понедельник")
+        Day.objects.create(pk=2, day="Вторник")
+        rebuild_users([self.user.pk])
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_writes_habit_once(self):
+        body = {
+            "place": "Place",
+            "time": "2025-03-30T16:30:00+03:00",
+            "action": "Action",
+            "pleasent": False,
+            "frequency": "m h * * d",
+            "reward": "Reward",
+            "execution_time": 90,
+            "days_of_week": [1, 2],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("habits_tracker:habit-create"), body, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query["sql"].split()[0] for query in queries if "userhabitstats" not in query["sql"]]
+        self.assertEqual(statements.count("INSERT"), 2)
+        self.assertNotIn("UPDATE", statements)
+        # Сохранение привычки - 7 запросов, обновление сводки пользователя - еще 4 (с точкой сохранения).
+        self.assertEqual(len(queries), 11)
+        habit = Habit.objects.get(pk=response.json()["id"])
+        self.assertEqual(habit.frequency, "30 16 * * Понедельник,Вторник")
+        self.assertIsNotNone(habit.next_run_at)
+
+    def test_update_writes_habit_once(self):
+        habit = Habit.objects.create(user=self.user, place="Place", action="Action", reward="Reward",
+                                     time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+        url = reverse("habits_tracker:habit-update", args=(habit.pk,))
+        body = {"frequency": "m h * * d", "time": "2025-03-30T10:00:00+03:00", "days_of_week": [2]}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, body, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [query["sql"].split()[0] for query in queries if "userhabitstats" not in query["sql"]]
+        self.assertEqual(statements.count("UPDATE"), 1)
+        habit.refresh_from_db()
+        self.assertEqual(habit.frequency, "0 10 * * Вторник")
+        self.assertEqual(list(habit.days_of_week.values_list("pk", flat=True)), [2])
+
+    def test_update_keeps_next_run_at_when_schedule_unchanged(self):
+        habit = Habit.objects.create(user=self.user, place="Place", action="Action", reward="Reward",
+                                     time="2025-03-30T16:30:00+03:00", frequency="30 16 * * *")
+        due_at = timezone.now() - timedelta(seconds=30)
+        Habit.objects.filter(pk=habit.pk).update(next_run_at=due_at)
+
+        response = self.client.patch(reverse("habits_tracker:habit-update", args=(habit.pk,)), {"place": "q"},
+                                     format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse("habits_tracker:habit-bulk"), [{"id": habit.pk, "place": "w"}],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        habit.refresh_from_db()
+        self.assertEqual(habit.place, "w")
+        self.assertEqual(habit.next_run_at, due_at)
@@ -1,16 +1,26 @@
 from django.urls import path
 
 from habits_tracker.apps import HabitsTrackerConfig
-from habits_tracker.views import (HabitCreateAPIView, HabitDestroyAPIView, HabitListAPIView, HabitRetrieveAPIView,
-                                  HabitUpdateAPIView, PublicHabitListAPIView)
+from habits_tracker.views import (HabitBulkAPIView, HabitCreateAPIView, HabitDestroyAPIView, HabitDoneAPIView,
+                                  HabitExportAPIView, HabitImportAPIView, HabitListAPIView, HabitRetrieveAPIView,
+                                  HabitStatsAPIView, HabitStreakAPIView, HabitUpdateAPIView,
+                                  PublicHabitCacheStatsAPIView, PublicHabitListAPIView, ReminderDeliveryStatsAPIView)
 
 app_name = HabitsTrackerConfig.name
 
 urlpatterns = [
     path("habits/new/", HabitCreateAPIView.as_view(), name="habit-create"),
+    path("habits/bulk/", HabitBulkAPIView.as_view(), name="habit-bulk"),
     path("habits/public/", PublicHabitListAPIView.as_view(), name="public-habit-list"),
+    path("habits/public/cache/", PublicHabitCacheStatsAPIView.as_view(), name="public-habit-cache"),
+    path("habits/stats/", HabitStatsAPIView.as_view(), name="habit-stats"),
+    path("habits/export/", HabitExportAPIView.as_view(), name="habit-export"),
+    path("habits/import/", HabitImportAPIView.as_view(), name="habit-import"),
+    path("habits/deliveries/stats/", ReminderDeliveryStatsAPIView.as_view(), name="delivery-stats"),
     path("habits/", HabitListAPIView.as_view(), name="habit-list"),
     path("habits/<int:pk>/", HabitRetrieveAPIView.as_view(), name="habit-detail"),
     path("habits/<int:pk>/update/", HabitUpdateAPIView.as_view(), name="habit-update"),
     path("habits/<int:pk>/delete/", HabitDestroyAPIView.as_view(), name="habit-delete"),
+    path("habits/<int:pk>/done/", HabitDoneAPIView.as_view(), name="habit-done"),
+    path("habits/<int:pk>/streak/", HabitStreakAPIView.as_view(), name="habit-streak"),
 ]
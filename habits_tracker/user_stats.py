@@ -0,0 +1,113 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Count
+
+from config.settings import HABIT_FREQUENCY
+from habits_tracker.models import Habit, UserHabitStats
+
+COUNTERS = ("total", "pleasant", "useful", "public")
+
+
+def _template_pattern(template: str) -> re.Pattern:
+    parts = [r"\d+" if char in "mhxyz" else r"\S+" if char == "d" else re.escape(char) for char in template]
+    return re.compile("".join(parts))
+
+
+TEMPLATE_PATTERNS = [(template, _template_pattern(template)) for template, name in HABIT_FREQUENCY]
+
+
+@lru_cache(maxsize=1024)
+def frequency_template(frequency: str | None) -> str | None:
+    """Шаблон частоты из HABIT_FREQUENCY, из которого получено расписание привычки."""
+    if frequency is None:
+        return None
+    for template, pattern in TEMPLATE_PATTERNS:
+        if frequency == template or pattern.fullmatch(frequency):
+            return template
+    return None
+
+
+def contribution(pleasent: bool, publicity: bool, frequency: str | None) -> Counter:
+    """Вклад одной привычки в сводку пользователя.
+
+    Приятные привычки хранят частоту по умолчанию, но расписания у них нет, поэтому по шаблонам частоты
+    считаются только полезные привычки.
+    """
+    counts = Counter(total=1, public=int(bool(publicity)))
+    counts["pleasant" if pleasent else "useful"] += 1
+    template = None if pleasent else frequency_template(frequency)
+    if template:
+        counts[f"frequency:{template}"] += 1
+    return counts
+
+
+def _fill(stats: UserHabitStats, counts: Counter) -> None:
+    for field in COUNTERS:
+        setattr(stats, field, counts[field])
+    stats.frequencies = {
+        key.split(":", 1)[1]: count for key, count in sorted(counts.items()) if key.startswith("frequency:") and count
+    }
+
+
+def _aggregate(user_ids) -> dict[int, Counter]:
+    """Сводки пользователей одним агрегирующим запросом по привычкам."""
+    totals = {user_id: Counter() for user_id in user_ids}
+    rows = (
+        Habit.objects.filter(user_id__in=totals)
+        .values_list("user_id", "pleasent", "publicity", "frequency")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for user_id, pleasent, publicity, frequency, count in rows:
+        for key, value in contribution(pleasent, publicity, frequency).items():
+            totals[user_id][key] += value * count
+    return totals
+
+
+def rebuild_users(user_ids) -> int:
+    """Пересчитывает сводки пользователей по их привычкам."""
+    totals = _aggregate(user_ids)
+    rows = []
+    for user_id, counts in totals.items():
+        stats = UserHabitStats(user_id=user_id)
+        _fill(stats, counts)
+        rows.append(stats)
+    with transaction.atomic():
+        UserHabitStats.objects.filter(user_id__in=totals).delete()
+        UserHabitStats.objects.bulk_create(rows)
+    return len(rows)
+
+
+def negate(counts: Counter) -> Counter:
+    return Counter({key: -value for key, value in counts.items()})
+
+
+def apply(user_id: int | None, delta: Counter, build_missing: bool = True) -> None:
+    """Добавляет изменение к сводке пользователя.
+
+    Сводка, которой еще нет, строится по привычкам целиком (при build_missing) или при первом запросе.
+    """
+    if user_id is None or not +delta and not -delta:
+        return
+    with transaction.atomic():
+        stats = UserHabitStats.objects.select_for_update().filter(user_id=user_id).first()
+        if stats is None:
+            if build_missing:
+                rebuild_users([user_id])
+            return
+        counts = Counter({field: getattr(stats, field) for field in COUNTERS})
+        counts.update({f"frequency:{template}": count for template, count in stats.frequencies.items()})
+        counts.update(delta)
+        _fill(stats, counts)
+        stats.save()
+
+
+def get_stats(user) -> UserHabitStats:
+    stats = UserHabitStats.objects.filter(user=user).first()
+    if stats is None:
+        rebuild_users([user.pk])
+        stats = UserHabitStats.objects.get(user=user)
+    return stats
@@ -1,82 +1,149 @@
+from dataclasses import dataclass
 from datetime import datetime
+
 from rest_framework.serializers import ValidationError
+
 from habits_tracker.models import Habit
+from habits_tracker.services import as_datetime
+
+
+def _as_pk(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class HabitAttrs:
+    """Данные привычки, один раз извлеченные из запроса для всех правил проверки."""
+    execution_time: int
+    related_habit_id: int | None
+    related_pleasant: bool | None
+    related_habits_id: object
+    reward: str | None
+    pleasent: bool
+    frequency: str
+    time: object
+    end_time: object
+    span: tuple[datetime, datetime] | None
+    days_of_week: list
 
 
 class HabitValidator:
-    def validate_time_for_execution(self, attrs):
+    """Проверка данных привычки.
+
+    Набор правил собирается один раз при создании валидатора, данные запроса разбираются один раз
+    для всех правил. Признаки приятности связанных привычек берутся из контекста сериализатора
+    (related_pleasant, см. load_related), иначе связанная привычка загружается отдельным запросом.
+    """
+    requires_context = True
+    rule_names = (
+        "validate_time_for_execution",
+        "validate_related_habit",
+        "validate_reward",
+        "validate_pleasant_habit",
+        "validate_end_time",
+        "validate_days_of_week",
+    )
+
+    def __init__(self):
+        self.rules = tuple(getattr(self, name) for name in self.rule_names)
+
+    @staticmethod
+    def load_related(items) -> dict[int, bool]:
+        """Признаки приятности связанных привычек всех элементов одним запросом."""
+        pks = {_as_pk(item.get("related_habit_id")) for item in items if item.get("related_habit_id")}
+        pks.discard(None)
+        return dict(Habit.objects.filter(pk__in=pks).values_list("pk", "pleasent")) if pks else {}
+
+    def parse(self, attrs, related: dict[int, bool] | None) -> HabitAttrs:
+        related_habit_id = _as_pk(attrs.get("related_habit_id")) if attrs.get("related_habit_id") else None
+        if related_habit_id is not None and (related is None or related_habit_id not in related):
+            related = self.load_related([attrs])
+        time, end_time = attrs.get("time"), attrs.get("end_time")
+        return HabitAttrs(
+            execution_time=attrs.get("execution_time", 0),
+            related_habit_id=related_habit_id,
+            related_pleasant=related.get(related_habit_id) if related_habit_id is not None else None,
+            related_habits_id=attrs.get("related_habits_id"),
+            reward=attrs.get("reward"),
+            pleasent=attrs.get("pleasent"),
+            frequency=attrs.get("frequency") or "",
+            time=time,
+            end_time=end_time,
+            span=(as_datetime(time), as_datetime(end_time)) if time and end_time else None,
+            days_of_week=attrs.get("days_of_week"),
+        )
+
+    def validate_time_for_execution(self, habit: HabitAttrs):
         """Проверка времени выполнения привычки."""
-        if attrs["execution_time"] > 120:
+        if habit.execution_time > 120:
             raise ValidationError("Время выполнения привычки не может быть больше 120 секунд!")
 
-    def validate_related_habit(self, attrs):
+    def validate_related_habit(self, habit: HabitAttrs):
         """Проверка связанной привычки на положительный статус приятной привычки."""
-        if attrs.get("related_habit_id"):
-            related_habit = Habit.objects.get(pk=attrs.get("related_habit_id"))
-            if not related_habit.pleasent:
-                raise ValidationError("Только приятные привычки могут быть связанными!")
+        if habit.related_habit_id is None:
+            return
+        if habit.related_pleasant is None:
+            raise ValidationError("Связанная привычка не найдена!")
+        if not habit.related_pleasant:
+            raise ValidationError("Только приятные привычки могут быть связанными!")
 
-    def validate_reward(self, attrs):
+    def validate_reward(self, habit: HabitAttrs):
         """Проверка на одновременное присутсвие награды и связанной привычки."""
-        if attrs.get("related_habits_id") and attrs.get("reward"):
+        if habit.related_habits_id and habit.reward:
             raise ValidationError(
                 "Запрещено выбирать одновременно награду и связанную привычку! Выберите что-то одно."
             )
 
-    def validate_pleasant_habit(self, attrs):
+    def validate_pleasant_habit(self, habit: HabitAttrs):
         """Проверка приятной привычки на начилие награды."""
-        if attrs.get("pleasent") and any(
-                [attrs.get("related_habits_id"), attrs.get("reward"), attrs.get("frequency"), attrs.get("time")]
-        ):
+        if habit.pleasent and any([habit.related_habits_id, habit.reward, habit.frequency, habit.time]):
             raise ValidationError(
                 "У приятной привычки не может быть вознаграждения!"
             )
-        if not attrs.get("pleasent") and not any(
-            [
-                all([attrs.get("reward"), attrs.get("frequency"), attrs.get("time")]),
-                all([attrs.get("related_habits_id"), attrs.get("frequency"), attrs.get("time")]),
-            ]
+        if not habit.pleasent and not (
+            habit.frequency and habit.time and (habit.reward or habit.related_habits_id)
         ):
             raise ValidationError(
                 "У полезной привчки должна быть награда или связанная привычка, "
                 "а также она должна выполняться в определенное время."
             )
 
-    def validate_end_time(self, attrs):
+    def validate_end_time(self, habit: HabitAttrs):
         """Проверка повторяющейся за один день привычки на признак присутствия времени окончания."""
-        if attrs.get("frequency") and "x" in attrs.get("frequency") and not attrs.get("end_time"):
+        if habit.frequency and "x" in habit.frequency and not habit.end_time:
             raise ValidationError(
                 "Для привычки, которая должна выполняться несколько раз в день, должно быть указано время окончания."
             )
-        if attrs.get("frequency") and "x" not in attrs.get("frequency") and attrs.get("end_time"):
+        if habit.frequency and "x" not in habit.frequency and habit.end_time:
             raise ValidationError(
                 "Время окончания должно быть выбрано только для привычек, выполняемых несколько раз в день."
             )
-        if (
-                attrs.get("end_time")
-                and attrs.get("time")
-                and datetime.fromisoformat(attrs.get("end_time")).date()
-                != datetime.fromisoformat(attrs.get("time")).date()
-        ):
-            raise ValidationError("Начало и время окончания должно быть выбрано в течение 1 дня.")
-        if attrs.get("end_time") and attrs.get("time") and attrs.get("end_time") <= attrs.get("time"):
-            raise ValidationError("Время окончания не может быть раньше или равное временю начала.")
+        if habit.span:
+            time, end_time = habit.span
+            if end_time.date() != time.date():
+                raise ValidationError("Начало и время окончания должно быть выбрано в течение 1 дня.")
+            if end_time <= time:
+                raise ValidationError("Время окончания не может быть раньше или равное временю начала.")
 
-    def validate_days_of_week(self, attrs):
+    def validate_days_of_week(self, habit: HabitAttrs):
         """Проверка выбора конкретных дней недели, когда должна быть выполнена привычка."""
-        if attrs.get("frequency") and "d" in attrs.get("frequency") and not attrs.get("days_of_week"):
+        if habit.frequency and "d" in habit.frequency and not habit.days_of_week:
             raise ValidationError(
                 "Для привычки, которая должна быть выполнена в определенные дни недели, необходимо вырать дни."
             )
-        if attrs.get("frequency") and "d" not in attrs.get("frequency") and attrs.get("days_of_week"):
+        if habit.frequency and "d" not in habit.frequency and habit.days_of_week:
             raise ValidationError(
                 "Конкретные дни должны быть выбраны только для привычек, выполняемых в определенные дни."
             )
 
-    def __call__(self, attrs):
-        self.validate_time_for_execution(attrs)
-        self.validate_related_habit(attrs)
-        self.validate_reward(attrs)
-        self.validate_pleasant_habit(attrs)
-        self.validate_end_time(attrs)
-        self.validate_days_of_week(attrs)
+    def validate(self, attrs, related: dict[int, bool] | None = None):
+        """Проверка данных привычки без сериализатора, related - признаки из load_related."""
+        habit = self.parse(attrs, related)
+        for rule in self.rules:
+            rule(habit)
+
+    def __call__(self, attrs, serializer=None):
+        self.validate(attrs, serializer.context.get("related_pleasant") if serializer else None)
@@ -1,42 +1,253 @@
-from django.shortcuts import get_object_or_404
-from django_celery_beat.models import PeriodicTask
-from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
-
-from habits_tracker.models import Habit
-from habits_tracker.paginators import HabitPaginator
-from habits_tracker.serializers import HabitSerializer, PublicHabitSerializer
-from habits_tracker.services import create_replacements, make_replacements, create_schedule, create_task
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.generics import (CreateAPIView, DestroyAPIView, GenericAPIView, ListAPIView, RetrieveAPIView,
+                                     UpdateAPIView)
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError
+from rest_framework.views import APIView
+
+from habits_tracker import delivery_log, export, feed_cache, importer, streaks, user_stats
+from habits_tracker.conditional import conditional_detail, conditional_list, list_count
+from habits_tracker.models import Habit, HabitStreak
+from habits_tracker.paginators import HabitCursorPaginator, HabitPaginator
+from habits_tracker.serializers import (HabitCompletionSerializer, HabitSerializer, PublicHabitSerializer,
+                                        RowSerializer, UserHabitStatsSerializer)
+from habits_tracker.services import bulk_save_habits
+from habits_tracker.validators import HabitValidator
 from users.permissions import IsUser
 
 
+class RowListMixin:
+    """Список только для чтения через RowSerializer (row_serializer), без создания объектов моделей.
+
+    Вывод совпадает с выводом serializer_class представления, при row_serializer = None используется
+    обычный сериализатор.
+    """
+    row_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.row_serializer.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.row_serializer.to_representation(queryset))
+        return self.get_paginated_response(self.row_serializer.to_representation(page))
+
+
 class HabitCreateAPIView(CreateAPIView):
     serializer_class = HabitSerializer
 
     def perform_create(self, serializer):
-        habit = serializer.save(user=self.request.user)
-        if not habit.pleasent:
-            replacements = create_replacements(habit)
-            habit.frequency = make_replacements(habit.frequency, replacements)
-            habit.save()
+        serializer.save(user=self.request.user)
+
+
+def _item_pk(value) -> int | None:
+    """id привычки из элемента запроса (число или строка из цифр), None для некорректного значения."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+class HabitBulkAPIView(APIView):
+    """Создание и обновление списка привычек одним запросом.
+
+    Элементы с ключом id обновляют привычки пользователя, остальные создают новые. Если хотя бы один
+    элемент не прошел проверку, ничего не сохраняется, а в ответе возвращаются ошибки по каждому элементу.
+    """
+    max_items = 500
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items or len(items) > self.max_items:
+            return Response(
+                {"non_field_errors": [f"Ожидается непустой список не более чем из {self.max_items} привычек."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        pks = [_item_pk(item["id"]) if isinstance(item, dict) and item.get("id") else None for item in items]
+        # Пользователь и связанная привычка нужны сериализатору и снимку напоминания каждого элемента.
+        instances = (
+            Habit.objects.filter(user=request.user)
+            .select_related("user", "related_habits")
+            .prefetch_related("days_of_week")
+            .in_bulk({pk for pk in pks if pk})
+        )
 
-            if habit.user.telegram_id:
-                schedule = create_schedule(habit.frequency)
-                create_task(schedule, habit)
+        # Связанные привычки всех элементов проверяются по одному запросу.
+        context = {
+            "request": request,
+            "related_pleasant": HabitValidator.load_related([item for item in items if isinstance(item, dict)]),
+        }
+        created, updated, errors, seen = [], [], [], set()
+        for item, pk in zip(items, pks):
+            if not isinstance(item, dict):
+                errors.append({"non_field_errors": ["Ожидается объект привычки."]})
+                continue
+            if item.get("id") and pk is None:
+                errors.append({"id": ["Некорректный id привычки."]})
+                continue
+            if pk in seen:
+                errors.append({"id": ["Привычка указана в запросе несколько раз."]})
+                continue
+            instance = instances.get(pk) if pk else None
+            if pk and instance is None:
+                errors.append({"id": ["Привычка не найдена."]})
+                continue
+            if pk:
+                seen.add(pk)
+            serializer = HabitSerializer(instance, data=item, context=context)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            errors.append({})
+            if instance is None:
+                created.append(serializer.validated_data)
+            else:
+                updated.append((instance, serializer.validated_data))
 
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
-class PublicHabitListAPIView(ListAPIView):
+        habits = bulk_save_habits(request.user, created, updated)
+        saved = Habit.objects.filter(pk__in=[habit.pk for habit in habits]).prefetch_related("days_of_week")
+        return Response(HabitSerializer(saved.order_by("id"), many=True).data, status=status.HTTP_201_CREATED)
+
+
+class PublicHabitListAPIView(RowListMixin, ListAPIView):
     serializer_class = PublicHabitSerializer
+    row_serializer = RowSerializer(PublicHabitSerializer)
+    pagination_class = HabitCursorPaginator
 
     def get_queryset(self):
-        return Habit.objects.filter(publicity=True)
+        return Habit.objects.filter(publicity=True).only(*PublicHabitSerializer.Meta.fields)
+
+    def list(self, request, *args, **kwargs):
+        if not feed_cache.is_enabled():
+            return super().list(request, *args, **kwargs)
+
+        key = feed_cache.page_key(request)
+        data = feed_cache.get_page(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = super().list(request, *args, **kwargs)
+        feed_cache.set_page(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class PublicHabitCacheStatsAPIView(APIView):
+    """Счетчики попаданий и промахов кеша публичной ленты."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(feed_cache.get_stats())
+
+
+class ReminderDeliveryStatsAPIView(APIView):
+    """Почасовая сводка отправок напоминаний за последние hours часов (по умолчанию 24, не более 744)."""
+    permission_classes = (IsAdminUser,)
+    max_hours = 24 * 31
+
+    def get(self, request):
+        try:
+            hours = int(request.query_params.get("hours", 24))
+        except ValueError:
+            raise ValidationError({"hours": "Укажите целое число часов."})
+        return Response(delivery_log.hourly_stats(min(max(hours, 1), self.max_hours)))
+
+
+class HabitStatsAPIView(RetrieveAPIView):
+    """Сводка привычек пользователя: всего, приятных и полезных, публичных и по шаблонам частоты."""
+    serializer_class = UserHabitStatsSerializer
 
+    def get_object(self):
+        return user_stats.get_stats(self.request.user)
 
-class HabitListAPIView(ListAPIView):
+
+class HabitExportAPIView(APIView):
+    """Выгрузка привычек пользователя потоком в формате NDJSON (по умолчанию) или CSV (?export_format=csv).
+
+    Администратор выгружает привычки всех пользователей или одного пользователя (?user=<id>).
+    """
+
+    def get(self, request):
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in export.FORMATS:
+            raise ValidationError({"export_format": f"Допустимые форматы: {', '.join(export.FORMATS)}."})
+
+        queryset = Habit.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        elif request.query_params.get("user"):
+            try:
+                queryset = queryset.filter(user_id=int(request.query_params["user"]))
+            except ValueError:
+                raise ValidationError({"user": "Укажите id пользователя."})
+
+        content_type, filename = export.FORMATS[export_format]
+        response = StreamingHttpResponse(export.stream(queryset, export_format), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class HabitImportAPIView(APIView):
+    """Импорт привычек пользователя из файла NDJSON или CSV (поле file) в формате выгрузки /habits/export/.
+
+    Формат задается параметром ?import_format или расширением файла. Ошибочные строки пропускаются
+    и перечисляются в отчете, остальные сохраняются пачками.
+    """
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Загрузите файл с привычками."})
+        default_format = "csv" if upload.name.lower().endswith(".csv") else "ndjson"
+        import_format = request.query_params.get("import_format", default_format)
+        if import_format not in importer.FORMATS:
+            raise ValidationError({"import_format": f"Допустимые форматы: {', '.join(importer.FORMATS)}."})
+
+        report = importer.import_habits(request.user, upload, import_format)
+        return Response(report, status=status.HTTP_201_CREATED if report["imported"] else status.HTTP_400_BAD_REQUEST)
+
+
+class HabitListAPIView(RowListMixin, ListAPIView):
     serializer_class = HabitSerializer
+    row_serializer = RowSerializer(HabitSerializer)
     pagination_class = HabitPaginator
+    cursor_pagination_class = HabitCursorPaginator
+
+    @property
+    def paginator(self):
+        """Курсорная пагинация включается параметром ?pagination=cursor."""
+        if not hasattr(self, "_paginator"):
+            query_params = getattr(getattr(self, "request", None), "query_params", {})
+            if query_params.get("pagination") == "cursor":
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user)
+        return Habit.objects.filter(user=self.request.user).prefetch_related("days_of_week").order_by("id")
+
+    def paginate_queryset(self, queryset):
+        """Число привычек уже посчитано для ETag, пагинатор использует его вместо повторного COUNT."""
+        queryset.count_hint = list_count(self.request)
+        return super().paginate_queryset(queryset)
+
+    @conditional_list
+    def get(self, request, *args, **kwargs):
+        """Список с ETag: при совпадении If-None-Match возвращается 304 без выборки привычек."""
+        return super().get(request, *args, **kwargs)
 
 
 class HabitRetrieveAPIView(RetrieveAPIView):
@@ -44,6 +255,11 @@ class HabitRetrieveAPIView(RetrieveAPIView):
     serializer_class = HabitSerializer
     permission_classes = (IsUser,)
 
+    @conditional_detail
+    def get(self, request, *args, **kwargs):
+        """Привычка с ETag и Last-Modified, для чужих привычек проверка не выполняется."""
+        return super().get(request, *args, **kwargs)
+
 
 class HabitUpdateAPIView(UpdateAPIView):
     queryset = Habit.objects.all()
@@ -51,25 +267,36 @@ class HabitUpdateAPIView(UpdateAPIView):
     permission_classes = (IsUser,)
 
     def perform_update(self, serializer):
-        habit = serializer.save(user=self.request.user)
+        serializer.save(user=self.request.user)
 
-        if not habit.pleasent:
-            replacements = create_replacements(habit)
-            habit.frequency = make_replacements(
-                habit.frequency, replacements
-            )
-            habit.save()
 
-            if habit.user.telegram_id:
-                task = get_object_or_404(PeriodicTask, name=f"Напоминаем о привычке {habit.pk}")
-                schedule = create_schedule(habit.frequency)
+class HabitDestroyAPIView(DestroyAPIView):
+    queryset = Habit.objects.all()
+    permission_classes = (IsUser,)
 
-                if task:
-                    task.enabled = False
-                    task.delete()
-                create_task(schedule, habit)
 
+class HabitDoneAPIView(GenericAPIView):
+    """Отметка о выполнении привычки за день (по умолчанию сегодня), в ответе - счетчики серии."""
+    queryset = Habit.objects.all()
+    serializer_class = HabitCompletionSerializer
+    permission_classes = (IsUser,)
 
-class HabitDestroyAPIView(DestroyAPIView):
+    def post(self, request, *args, **kwargs):
+        habit = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        day = serializer.validated_data.get("date") or timezone.localdate()
+        streak = streaks.mark_done(habit, day)
+        return Response(streaks.get_stats(streak, timezone.localdate()), status=status.HTTP_201_CREATED)
+
+
+class HabitStreakAPIView(GenericAPIView):
+    """Текущая и самая длинная серии выполнений привычки и доля выполненных дней."""
     queryset = Habit.objects.all()
     permission_classes = (IsUser,)
+
+    def get(self, request, *args, **kwargs):
+        habit = self.get_object()
+        streak = HabitStreak.objects.filter(habit=habit).first() or HabitStreak(habit=habit)
+        streak.habit = habit
+        return Response(streaks.get_stats(streak, timezone.localdate()))